@@ -0,0 +1,329 @@
+"""Headless async HTTP API for running interviews without Streamlit.
+
+Run with:
+    uvicorn api_service:app --host 0.0.0.0 --port 8000
+
+Every interview lives in memory as a small state dict, and all Gemini calls go
+through one shared async HTTP client, so a single process can keep thousands of
+interviews open while they wait on the model.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+import interview_core
+from interview_core import MODEL_ROUTES
+
+
+# Service config
+API_SESSION_TTL = float(os.getenv("API_SESSION_TTL", "7200"))
+API_MAX_SESSIONS = int(os.getenv("API_MAX_SESSIONS", "10000"))
+API_MAX_CONNECTIONS = int(os.getenv("API_MAX_CONNECTIONS", "200"))
+API_SWEEP_INTERVAL = float(os.getenv("API_SWEEP_INTERVAL", "60"))
+
+logger = logging.getLogger("interview_bot.api")
+
+# Shared state of this process
+http_client = None
+route_latencies = interview_core.new_route_latencies()
+interviews = {}
+starting_interviews = 0  # Starts waiting on question generation, each holding a slot under API_MAX_SESSIONS
+background_tasks = set()
+
+
+class StartInterviewRequest(BaseModel):
+    resume_text: str = Field(min_length=1)
+    num_questions: int = Field(5, ge=1, le=20)
+    adaptive_mode: bool = False
+    follow_up_threshold: int = Field(5, ge=1, le=10)
+
+
+class AnswerRequest(BaseModel):
+    answer: str = Field(min_length=1)
+
+
+async def post_gemini(url, data, timeout):
+    """Send one generateContent request and time it"""
+    started = time.monotonic()
+    response = await http_client.post(url, headers=interview_core.gemini_headers(), json=data, timeout=timeout)
+    return response, time.monotonic() - started
+
+
+async def call_gemini(route_name, data, alternate_data=None):
+    """Send a request through the route for this call type, hedging to the alternate model when slow"""
+    route = MODEL_ROUTES[route_name]
+    loop = asyncio.get_running_loop()
+    p95 = interview_core.rolling_p95(route_latencies[route_name]["primary"])
+    call = interview_core.new_hedged_call(route_name, p95)
+    primary = asyncio.create_task(post_gemini(route["url"], data, route["timeout"]))
+    interview_core.hedged_call_started(call, "primary", loop.time())
+    attempts = {primary: "primary"}
+    pending = {primary}
+
+    try:
+        while pending:
+            timeout = interview_core.hedged_call_wait(call, loop.time())
+            if timeout is None:
+                break
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                try:
+                    response, elapsed = task.result()
+                except httpx.HTTPError as e:
+                    call["error"] = e
+                    continue
+                if interview_core.hedged_call_accepts(call, attempts[task], response, elapsed):
+                    return response
+
+            hedge_timeout = interview_core.hedge_timeout(call, loop.time(), pending)
+            if hedge_timeout is not None:
+                alternate = asyncio.create_task(post_gemini(route["alternate_url"], alternate_data or data, hedge_timeout))
+                interview_core.hedged_call_started(call, "alternate", loop.time())
+                attempts[alternate] = "alternate"
+                pending.add(alternate)
+    finally:
+        samples = interview_core.hedged_call_samples(call, [attempts[task] for task in pending], loop.time())
+        for attempt, seconds in samples:
+            route_latencies[route_name][attempt].append(seconds)
+        # Cancel whichever request is still in flight
+        for task in pending:
+            task.cancel()
+
+    if call["fallback"] is not None:
+        return call["fallback"]
+    if call["error"] is not None:
+        raise call["error"]
+    raise httpx.TimeoutException(f"No response from the {route_name} route within {route['timeout']}s")
+
+
+async def generate_questions(resume_text, num_questions, route="generate"):
+    """Generate interview questions based on resume content using Gemini API"""
+    try:
+        prompt = interview_core.build_question_prompt(resume_text, num_questions)
+        response = await call_gemini(route, interview_core.build_gemini_request(prompt))
+        if response.status_code == 200:
+            text_response = interview_core.extract_response_text(response.json())
+            return interview_core.parse_questions(text_response, num_questions)
+        logger.warning("Failed to generate questions: API returned %s", response.status_code)
+    except Exception as e:
+        logger.warning("Error generating questions: %s", e)
+    return interview_core.default_questions(num_questions)
+
+
+async def send_context_cache_request(request):
+    """Send a cachedContents request and return its status code and JSON body, or (None, None) if it failed"""
+    try:
+        response = await http_client.request(**request)
+    except httpx.HTTPError:
+        return None, None
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, None
+
+
+async def create_context_cache(resume_text, num_questions):
+    """Register the evaluator instructions and resume as a cached prefix, or return None if unavailable"""
+    request = interview_core.build_context_cache_create(resume_text, num_questions)
+    if request is None:
+        return None
+    return interview_core.context_cache_created(*await send_context_cache_request(request), time.time())
+
+
+async def renew_context_cache(cache):
+    """Extend the cache TTL while the interview is running, or return None if it is gone"""
+    status_code, _ = await send_context_cache_request(interview_core.build_context_cache_renew(cache))
+    return interview_core.context_cache_renewed(cache, status_code, time.time())
+
+
+async def delete_context_cache(cache):
+    """Delete the cached prefix instead of waiting for it to expire"""
+    if cache and http_client is not None:
+        await send_context_cache_request(interview_core.build_context_cache_delete(cache))
+
+
+def schedule_cache_deletion(cache):
+    """Delete a cache in the background without holding up the caller"""
+    if cache:
+        task = asyncio.create_task(delete_context_cache(cache))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+async def get_context_cache(state):
+    """The interview's cached prefix for the evaluate route, renewed if it is close to expiring"""
+    cache = interview_core.usable_context_cache(state["context_cache"])
+    if cache and interview_core.context_cache_needs_renewal(cache, time.time()):
+        cache = await renew_context_cache(cache)
+        state["context_cache"] = cache
+    return cache
+
+
+async def evaluate_answer(state, question, answer):
+    """Use Gemini API to evaluate the answer"""
+    try:
+        conversation_summary = state["conversation_summary"] if state["adaptive_mode"] else None
+        cache = await get_context_cache(state)
+        plan = interview_core.plan_evaluation(question, answer, state["resume_text"], conversation_summary, cache)
+        evaluation = None
+        while evaluation is None:
+            response = await call_gemini("evaluate", plan["data"], plan["alternate_data"])
+            response_data = response.json() if response.status_code == 200 else None
+            evaluation, plan = interview_core.handle_evaluation_response(state, plan, response.status_code, response_data)
+        return evaluation
+    except Exception as e:
+        return interview_core.fallback_evaluation(f"Error: {str(e)}")
+
+
+async def generate_follow_up_question(state, question, answer, evaluation):
+    """Generate a follow-up question that probes a weak answer, or None if generation fails"""
+    try:
+        prompt = interview_core.build_follow_up_prompt(question, answer, evaluation, state["conversation_summary"])
+        response = await call_gemini("follow_up", interview_core.build_gemini_request(prompt))
+        response_data = response.json() if response.status_code == 200 else None
+        return interview_core.handle_follow_up_response(state, prompt, response_data)
+    except Exception:
+        return None
+
+
+def get_interview(interview_id):
+    """Look up a live interview and mark it as recently used"""
+    interview = interviews.get(interview_id)
+    if interview is None:
+        raise HTTPException(status_code=404, detail="Interview not found")
+    interview["touched_at"] = time.monotonic()
+    return interview
+
+
+def interview_view(interview_id, state):
+    """Public view of where an interview stands"""
+    return {
+        "interview_id": interview_id,
+        "question": interview_core.pending_question(state),
+        "question_number": state["current_question"],
+        "num_questions": state["num_questions"],
+        "follow_up": state["active_follow_up"] is not None,
+        "completed": state["interview_completed"]
+    }
+
+
+def sweep_expired_interviews():
+    """Drop interviews that have been idle for longer than the session TTL"""
+    cutoff = time.monotonic() - API_SESSION_TTL
+    for interview_id in [key for key, interview in interviews.items() if interview["touched_at"] < cutoff]:
+        schedule_cache_deletion(interviews.pop(interview_id)["state"]["context_cache"])
+
+
+async def run_sweeper():
+    """Background task that keeps the interview store bounded"""
+    while True:
+        await asyncio.sleep(API_SWEEP_INTERVAL)
+        sweep_expired_interviews()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    global http_client
+    limits = httpx.Limits(max_connections=API_MAX_CONNECTIONS, max_keepalive_connections=API_MAX_CONNECTIONS)
+    http_client = httpx.AsyncClient(limits=limits)
+    sweeper = asyncio.create_task(run_sweeper())
+    try:
+        yield
+    finally:
+        sweeper.cancel()
+        await asyncio.gather(
+            *(delete_context_cache(interview["state"]["context_cache"]) for interview in interviews.values()),
+            *background_tasks
+        )
+        await http_client.aclose()
+        http_client = None
+
+
+app = FastAPI(title="Resume Interview Simulator API", lifespan=lifespan)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "interviews": len(interviews)}
+
+
+@app.post("/interviews", status_code=201)
+async def start_interview(request: StartInterviewRequest):
+    global starting_interviews
+    if len(interviews) + starting_interviews >= API_MAX_SESSIONS:
+        sweep_expired_interviews()
+        if len(interviews) + starting_interviews >= API_MAX_SESSIONS:
+            raise HTTPException(status_code=503, detail="Too many active interviews")
+
+    # Reserve the slot before awaiting, so concurrent starts can't all pass the check above
+    starting_interviews += 1
+    try:
+        # Prompts never use more of the resume than this, so don't keep more in memory
+        resume_text = request.resume_text[:interview_core.RESUME_CONTEXT_CHARS]
+        state = interview_core.new_interview_state(
+            resume_text,
+            request.num_questions,
+            request.adaptive_mode,
+            request.follow_up_threshold
+        )
+        # Register the evaluator prefix while the questions are being generated
+        questions, context_cache = await asyncio.gather(
+            generate_questions(resume_text, request.num_questions),
+            create_context_cache(resume_text, request.num_questions)
+        )
+        interview_core.start_interview(state, questions)
+        state["context_cache"] = context_cache
+
+        interview_id = uuid.uuid4().hex
+        interviews[interview_id] = {"state": state, "lock": asyncio.Lock(), "touched_at": time.monotonic()}
+    finally:
+        starting_interviews -= 1
+    return interview_view(interview_id, state)
+
+
+@app.get("/interviews/{interview_id}")
+async def get_interview_state(interview_id: str):
+    state = get_interview(interview_id)["state"]
+    return {**interview_view(interview_id, state), "messages": state["messages"]}
+
+
+@app.post("/interviews/{interview_id}/answers")
+async def submit_answer(interview_id: str, request: AnswerRequest):
+    interview = get_interview(interview_id)
+    state = interview["state"]
+
+    # Answers to the same interview are processed one at a time
+    async with interview["lock"]:
+        if state["interview_completed"]:
+            raise HTTPException(status_code=409, detail="Interview already completed")
+
+        question_text = interview_core.record_answer(state, request.answer)
+        evaluation = await evaluate_answer(state, question_text, request.answer)
+
+        follow_up = None
+        if interview_core.apply_evaluation(state, question_text, request.answer, evaluation):
+            follow_up = await generate_follow_up_question(state, question_text, request.answer, evaluation)
+        interview_core.apply_follow_up(state, follow_up)
+
+    return {**interview_view(interview_id, state), "evaluation": evaluation}
+
+
+@app.get("/interviews/{interview_id}/summary")
+async def get_summary(interview_id: str):
+    state = get_interview(interview_id)["state"]
+    summary_data = state.get("summary_data") or interview_core.generate_interview_summary(state)
+    return {**summary_data, "completed": state["interview_completed"], "prompt_tokens": state["prompt_tokens"]}
+
+
+@app.delete("/interviews/{interview_id}", status_code=204)
+async def delete_interview(interview_id: str):
+    get_interview(interview_id)
+    await delete_context_cache(interviews.pop(interview_id)["state"]["context_cache"])
@@ -2,26 +2,60 @@ import streamlit as st
 import os
 import requests
 import json
-import PyPDF2
-import tempfile
+import hashlib
+import io
+import logging
+import logging.handlers
+import cProfile
+import pstats
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import pandas as pd
 import altair as alt
 import plotly.graph_objects as go
-from dotenv import load_dotenv
 
+import interview_core
+from interview_core import (
+    MODEL_ROUTES,
+    extract_text_from_pdf
+)
 
-# Load environment variables
-load_dotenv()
+# Profiling config: enable with ?profile=1 (or cprofile/pyinstrument) or PROFILE_RERUNS
+PROFILE_RERUNS = os.getenv("PROFILE_RERUNS", "")
+PROFILE_LOG_PATH = os.getenv("PROFILE_LOG_PATH", "profiles/reruns.jsonl")
+PROFILE_LOG_MAX_BYTES = int(os.getenv("PROFILE_LOG_MAX_BYTES", str(1024 * 1024)))
+PROFILE_LOG_BACKUPS = int(os.getenv("PROFILE_LOG_BACKUPS", "5"))
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "5"))
 
-# API Config
-GEMINI_API_URL = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "your_api_key_here")
+# Contact form config
+WEB3FORMS_ENDPOINT = os.getenv("WEB3FORMS_ENDPOINT", "https://api.web3forms.com/submit")
+WEB3FORMS_ACCESS_KEY = os.getenv("WEB3FORMS_ACCESS_KEY", "1cbc4557-1623-421b-aa23-8a40bb5be0e0")
+OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH", "contact_outbox.db")
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+OUTBOX_POLL_INTERVAL = float(os.getenv("OUTBOX_POLL_INTERVAL", "5"))
+OUTBOX_BACKOFF_BASE = float(os.getenv("OUTBOX_BACKOFF_BASE", "2"))
+OUTBOX_BACKOFF_MAX = float(os.getenv("OUTBOX_BACKOFF_MAX", "600"))
+# Delivered and failed submissions are kept this long for status checks, then deleted
+OUTBOX_SENT_RETENTION_DAYS = float(os.getenv("OUTBOX_SENT_RETENTION_DAYS", "1"))
+OUTBOX_FAILED_RETENTION_DAYS = float(os.getenv("OUTBOX_FAILED_RETENTION_DAYS", "30"))
+OUTBOX_PRUNE_INTERVAL = float(os.getenv("OUTBOX_PRUNE_INTERVAL", "3600"))
+
+# Gemini worker pool: a waiting session can hold a primary and a hedged request at once,
+# so size it at about twice the number of sessions expected to be answering concurrently
+GEMINI_MAX_WORKERS = int(os.getenv("GEMINI_MAX_WORKERS", "64"))
+
+logger = logging.getLogger("interview_bot.app")
 
 # App configuration
 st.set_page_config(page_title="Resume Interview Simulator", layout="wide")
 
 # Custom CSS for better UI
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .chat-container {
         border: 1px solid #ddd;
@@ -69,248 +103,445 @@ st.markdown("""
         margin-top: 20px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
 
 # Initialize session state
-if 'messages' not in st.session_state:
-    st.session_state.messages = []
-if 'current_question' not in st.session_state:
-    st.session_state.current_question = 0
-if 'resume_text' not in st.session_state:
-    st.session_state.resume_text = ""
-if 'interview_started' not in st.session_state:
-    st.session_state.interview_started = False
-if 'interview_completed' not in st.session_state:
-    st.session_state.interview_completed = False
-if 'evaluations' not in st.session_state:
-    st.session_state.evaluations = []
-if 'total_score' not in st.session_state:
-    st.session_state.total_score = 0
-if 'num_questions' not in st.session_state:
-    st.session_state.num_questions = 5
+for key, value in interview_core.new_interview_state().items():
+    if key not in st.session_state:
+        st.session_state[key] = value
 if 'current_page' not in st.session_state:
     st.session_state.current_page = "interview"  # Default to interview page
+if 'speculative_questions' not in st.session_state:
+    st.session_state.speculative_questions = None
+if 'context_cache_future' not in st.session_state:
+    st.session_state.context_cache_future = None
 
-def generate_questions_from_resume(resume_text, num_questions=5):
-    """Generate interview questions based on resume content using Gemini API"""
+def inject_custom_css():
+    """Inject custom CSS for better UI"""
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Timing tree of the rerun being profiled on this thread
+profiler_state = threading.local()
+
+@contextmanager
+def profile_section(name):
+    """Time a block as a child of the enclosing section when the rerun is being profiled"""
+    stack = getattr(profiler_state, "stack", None)
+    if not stack:
+        yield
+        return
+    
+    node = stack[-1]["children"].setdefault(name, {"elapsed": 0.0, "calls": 0, "children": {}})
+    stack.append(node)
+    started = time.perf_counter()
     try:
-        prompt = f"""
-        You are a technical interviewer preparing for an interview with a candidate. 
-        
-        I have the candidate's resume text below. Based on their experience, skills, and background,
-        generate {num_questions} relevant technical interview questions that will help evaluate their knowledge and expertise.
-        
-        The questions should be specific to their background and technical skills mentioned in the resume.
-        Include a mix of technical knowledge, problem-solving, and experience-based questions.
-        
-        Resume: {resume_text[:3000]}
-        
-        Output exactly {num_questions} questions as a JSON array of strings:
-        ["Question 1", "Question 2", ..., "Question {num_questions}"]
-        """
-        
-        headers = {
-            "Content-Type": "application/json",
-            "x-goog-api-key": GEMINI_API_KEY
-        }
+        yield
+    finally:
+        node["elapsed"] += time.perf_counter() - started
+        node["calls"] += 1
+        stack.pop()
+
+def get_profile_mode():
+    """Return the requested profiling mode for this rerun, or None when profiling is off"""
+    mode = (st.query_params.get("profile") or PROFILE_RERUNS).strip().lower()
+    if mode in ("", "0", "false", "off"):
+        return None
+    return mode
+
+def start_code_profiler(mode):
+    """Start a cProfile or pyinstrument capture if the mode asks for one"""
+    if mode == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            return profiler
+        except ImportError:
+            mode = "cprofile"  # Fall back when pyinstrument is not installed
+    
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+    return None
+
+def stop_code_profiler(profiler):
+    """Stop the capture and return its text report"""
+    if profiler is None:
+        return None
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(30)
+        return output.getvalue()
+    profiler.stop()
+    return profiler.output_text()
+
+def format_profile_tree(node, name="rerun", depth=0):
+    """Render a timing tree as indented lines, slowest sections first"""
+    calls = f" x{node['calls']}" if node["calls"] > 1 else ""
+    lines = [f"{'  ' * depth}{name}: {node['elapsed'] * 1000:.1f} ms{calls}"]
+    for child_name, child in sorted(node["children"].items(), key=lambda item: -item[1]["elapsed"]):
+        lines.extend(format_profile_tree(child, child_name, depth + 1))
+    return lines
+
+@st.cache_resource
+def get_profile_logger():
+    """Logger that appends one JSON line per profiled rerun to a rotating file"""
+    log_dir = os.path.dirname(PROFILE_LOG_PATH)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    
+    logger = logging.getLogger("interview_bot.profile")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = logging.handlers.RotatingFileHandler(
+            PROFILE_LOG_PATH,
+            maxBytes=PROFILE_LOG_MAX_BYTES,
+            backupCount=PROFILE_LOG_BACKUPS
+        )
+        logger.addHandler(handler)
+    return logger
+
+def show_rerun_profiles():
+    """Sidebar panel with the latest profiled reruns, including ones cut short by st.rerun()"""
+    with st.sidebar:
+        with st.expander("Rerun Profile", expanded=False):
+            for profile in reversed(st.session_state.rerun_profiles):
+                status = "" if profile["completed"] else " (interrupted by a rerun)"
+                st.caption(f"{time.strftime('%H:%M:%S', time.localtime(profile['timestamp']))}{status}")
+                st.code("\n".join(format_profile_tree(profile["tree"])), language=None)
+                if profile["report"]:
+                    st.code(profile["report"], language=None)
+
+def run_with_profiling(render, mode):
+    """Run one rerun under the section timer, then log and display the results"""
+    root = {"elapsed": 0.0, "calls": 1, "children": {}}
+    profiler_state.stack = [root]
+    profiler = start_code_profiler(mode)
+    started = time.perf_counter()
+    completed = False
+    
+    try:
+        render()
+        completed = True
+    finally:
+        root["elapsed"] = time.perf_counter() - started
+        profiler_state.stack = None
+        report = stop_code_profiler(profiler)
         
-        data = {
-            "contents": [{
-                "parts": [{
-                    "text": prompt
-                }]
-            }]
-        }
+        finished_at = time.time()
         
-        response = requests.post(GEMINI_API_URL, headers=headers, json=data)
+        # Kept in the session so a rerun that ends in st.rerun() shows up on the next one
+        profiles = st.session_state.setdefault("rerun_profiles", [])
+        profiles.append({"timestamp": finished_at, "completed": completed, "tree": root, "report": report})
+        del profiles[:-PROFILE_HISTORY]
         
-        if response.status_code == 200:
-            response_data = response.json()
-            text_response = response_data['candidates'][0]['content']['parts'][0]['text']
-            
-            # Extract JSON array from response
-            if '```json' in text_response:
-                json_str = text_response.split('```json')[1].split('```')[0].strip()
-            elif '```' in text_response:
-                json_str = text_response.split('```')[1].strip()
-            else:
-                json_str = text_response
-            
-            # Clean up the JSON string if needed
-            json_str = json_str.replace('`', '')
-            
-            # Parse the JSON to get the questions
-            questions = json.loads(json_str)
-            
-            # Ensure we have exactly the requested number of questions
-            if len(questions) > num_questions:
-                questions = questions[:num_questions]
-            elif len(questions) < num_questions:
-                # Add generic questions if needed
-                generic_questions = [
-                    "Tell me about your background in software development.",
-                    "Explain a challenging project you worked on and how you overcame obstacles.",
-                    "How do you approach debugging a complex issue?",
-                    "How do you stay updated with the latest technological trends?",
-                    "Where do you see yourself in 5 years in terms of technical expertise?",
-                    "What development methodologies are you familiar with?",
-                    "Describe your experience with cloud platforms.",
-                    "How do you handle code reviews?",
-                    "What's your approach to continuous learning?",
-                    "How do you prioritize tasks when working on multiple projects?",
-                    "Describe your experience with performance optimization.",
-                    "How do you ensure your code is secure?",
-                    "What's your experience with containerization technologies?",
-                    "How do you document your code?",
-                    "Describe a time when you had to learn a new technology quickly."
-                ]
-                questions.extend(generic_questions[:(num_questions-len(questions))])
-            
-            return questions
-        else:
-            st.error(f"Failed to generate questions: API returned {response.status_code}")
-            default_questions = [
-                "Tell me about your background in software development.",
-                "Explain your experience with Python and related frameworks.",
-                "Describe a challenging project you worked on and how you overcame obstacles.",
-                "How do you approach debugging a complex issue in a production environment?",
-                "What's your experience with database systems and SQL?",
-                "How do you stay updated with the latest technological trends?",
-                "Explain your understanding of RESTful APIs and microservices.",
-                "Describe your experience with version control systems like Git.",
-                "How do you approach testing and ensuring code quality?",
-                "Where do you see yourself in 5 years in terms of technical expertise?",
-                "What development methodologies are you most comfortable with?",
-                "How do you handle requirements that change during development?",
-                "Tell me about your experience with cloud platforms.",
-                "How do you ensure your code is maintainable?",
-                "Describe your approach to code reviews.",
-                "What strategies do you use for debugging complex issues?",
-                "How do you stay current with technology trends?",
-                "Describe your experience with performance optimization.",
-                "How do you approach learning a new programming language or framework?",
-                "What's your experience with containerization and orchestration?"
-            ]
-            return default_questions[:num_questions]
+        try:
+            get_profile_logger().info(json.dumps({
+                "timestamp": finished_at,
+                "page": st.session_state.current_page,
+                "mode": mode,
+                "elapsed_ms": root["elapsed"] * 1000,
+                "tree": root,
+                "profile": report
+            }))
+        except OSError as e:
+            logger.warning("Could not write rerun profile: %s", e)
+    
+    show_rerun_profiles()
+
+@st.cache_resource
+def get_route_latencies():
+    """Rolling latency samples per route and model, shared by all sessions in this process"""
+    return {"lock": threading.Lock(), "samples": interview_core.new_route_latencies()}
+
+@st.cache_resource
+def get_gemini_executor():
+    """Worker pool used to run primary and hedged Gemini requests; losing requests are aborted, not waited out"""
+    return ThreadPoolExecutor(max_workers=GEMINI_MAX_WORKERS, thread_name_prefix="gemini")
+
+def record_route_latencies(route_name, samples):
+    """Add (attempt, seconds) samples to the rolling windows of the route's primary and alternate models"""
+    latencies = get_route_latencies()
+    with latencies["lock"]:
+        for attempt, seconds in samples:
+            latencies["samples"][route_name][attempt].append(seconds)
+
+def get_route_p95(route_name):
+    """Return the rolling p95 latency of a route's primary model, or None until enough samples exist"""
+    latencies = get_route_latencies()
+    with latencies["lock"]:
+        samples = list(latencies["samples"][route_name]["primary"])
+    return interview_core.rolling_p95(samples)
+
+class AbortableAdapter(requests.adapters.HTTPAdapter):
+    """Transport adapter whose in-flight requests can be aborted from another thread"""
+
+    def __init__(self):
+        self.connections = []
+        self.aborted = False
+        self.started_at = None  # Set once a worker picks the request up
+        super().__init__(max_retries=0)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        connections = self.connections
+
+        def tracked(pool_cls):
+            class TrackedPool(pool_cls):
+                def _new_conn(self):
+                    conn = super()._new_conn()
+                    connections.append(conn)
+                    return conn
+            return TrackedPool
+
+        pool_classes = self.poolmanager.pool_classes_by_scheme
+        self.poolmanager.pool_classes_by_scheme = {scheme: tracked(cls) for scheme, cls in pool_classes.items()}
+
+    def abort(self):
+        """Shut down open sockets so a request blocked on the response fails right away"""
+        self.aborted = True
+        for conn in list(self.connections):
+            sock = getattr(conn, "sock", None)
+            if sock is not None:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+def post_gemini(url, data, timeout, adapter):
+    """Send one generateContent request over its own abortable connection and time it"""
+    started = adapter.started_at = time.monotonic()
+    with requests.Session() as session:
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if adapter.aborted:
+            return None, 0
+        response = session.post(url, headers=interview_core.gemini_headers(), json=data, timeout=timeout)
+    return response, time.monotonic() - started
+
+def mark_started_attempts(call, adapters):
+    """Start the latency clocks of the requests a worker has picked up since the last check"""
+    for attempt, adapter in adapters.items():
+        if adapter.started_at is not None:
+            interview_core.hedged_call_started(call, attempt, adapter.started_at)
+
+def call_gemini(route_name, data, alternate_data=None):
+    """Send a request through the route for this call type, hedging to the alternate model when slow"""
+    with profile_section(f"gemini:{route_name}"):
+        route = MODEL_ROUTES[route_name]
+        executor = get_gemini_executor()
+        call = interview_core.new_hedged_call(route_name, get_route_p95(route_name))
+        adapters = {"primary": AbortableAdapter(), "alternate": AbortableAdapter()}
+        primary = executor.submit(post_gemini, route["url"], data, route["timeout"], adapters["primary"])
+        attempts = {primary: "primary"}
+        pending = {primary}
+
+        try:
+            while pending:
+                timeout = interview_core.hedged_call_wait(call, time.monotonic())
+                if timeout is None:
+                    break
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                mark_started_attempts(call, adapters)
+
+                for future in done:
+                    try:
+                        response, elapsed = future.result()
+                    except requests.exceptions.RequestException as e:
+                        call["error"] = e
+                        continue
+                    if interview_core.hedged_call_accepts(call, attempts[future], response, elapsed):
+                        return response
+
+                hedge_timeout = interview_core.hedge_timeout(call, time.monotonic(), pending)
+                if hedge_timeout is not None:
+                    alternate = executor.submit(
+                        post_gemini,
+                        route["alternate_url"],
+                        alternate_data or data,
+                        hedge_timeout,
+                        adapters["alternate"]
+                    )
+                    attempts[alternate] = "alternate"
+                    pending.add(alternate)
+        finally:
+            mark_started_attempts(call, adapters)
+            record_route_latencies(
+                route_name,
+                interview_core.hedged_call_samples(call, [attempts[future] for future in pending], time.monotonic())
+            )
+            # Abort whichever request is still in flight so it frees its worker right away
+            for future in pending:
+                future.cancel()
+                adapters[attempts[future]].abort()
+
+        if call["fallback"] is not None:
+            return call["fallback"]
+        if call["error"] is not None:
+            raise call["error"]
+        raise requests.exceptions.Timeout(f"No response from the {route_name} route within {route['timeout']}s")
+
+def fetch_questions(resume_text, num_questions, route="generate"):
+    """Ask Gemini for interview questions, raising on failure; safe to run off the script thread"""
+    prompt = interview_core.build_question_prompt(resume_text, num_questions)
+    response = call_gemini(route, interview_core.build_gemini_request(prompt))
+    if response.status_code != 200:
+        raise requests.exceptions.HTTPError(f"API returned {response.status_code}", response=response)
+    
+    text_response = interview_core.extract_response_text(response.json())
+    return interview_core.parse_questions(text_response, num_questions)
+
+def generate_questions_from_resume(resume_text, num_questions=5, route="generate"):
+    """Generate interview questions based on resume content using Gemini API"""
+    try:
+        return fetch_questions(resume_text, num_questions, route)
+    except requests.exceptions.HTTPError as e:
+        st.error(f"Failed to generate questions: {str(e)}")
+        return interview_core.default_questions(num_questions)
     except Exception as e:
         st.error(f"Error generating questions: {str(e)}")
-        default_questions = [
-            "Tell me about your background in software development.",
-            "Explain your experience with Python and related frameworks.",
-            "Describe a challenging project you worked on and how you overcame obstacles.",
-            "How do you approach debugging a complex issue in a production environment?",
-            "What's your experience with database systems and SQL?",
-            "How do you stay updated with the latest technological trends?",
-            "Explain your understanding of RESTful APIs and microservices.",
-            "Describe your experience with version control systems like Git.",
-            "How do you approach testing and ensuring code quality?",
-            "Where do you see yourself in 5 years in terms of technical expertise?",
-            "What development methodologies are you most comfortable with?",
-            "How do you handle requirements that change during development?",
-            "Tell me about your experience with cloud platforms.",
-            "How do you ensure your code is maintainable?",
-            "Describe your approach to code reviews.",
-            "What strategies do you use for debugging complex issues?",
-            "How do you stay current with technology trends?",
-            "Describe your experience with performance optimization.",
-            "How do you approach learning a new programming language or framework?",
-            "What's your experience with containerization and orchestration?"
-        ]
-        return default_questions[:num_questions]
-
-def extract_text_from_pdf(pdf_file):
-    """Extract text from uploaded PDF file"""
-    text = ""
-    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-        temp_file.write(pdf_file.getvalue())
-        temp_file_path = temp_file.name
+        return interview_core.default_questions(num_questions)
+
+@st.cache_resource
+def get_speculation_executor():
+    """Worker pool for question generation started before the interview begins"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculate")
+
+def get_speculation_key(resume_text):
+    """Identify speculative work by resume content"""
+    return hashlib.sha256(resume_text.encode("utf-8")).hexdigest()
+
+def cancel_speculative_questions():
+    """Drop any speculative question generation for this session"""
+    speculation = st.session_state.speculative_questions
+    if speculation:
+        speculation["future"].cancel()
+    st.session_state.speculative_questions = None
+
+def start_speculative_questions(resume_text, num_questions):
+    """Start generating questions in the background as soon as a resume is available
+    
+    The work is keyed by the resume alone, so moving the question slider never starts another
+    call; a job that is still queued is simply resubmitted with the new count.
+    """
+    if not resume_text.strip():
+        return
+    
+    key = get_speculation_key(resume_text)
+    speculation = st.session_state.speculative_questions
+    if speculation and speculation["key"] == key:
+        if speculation["num_questions"] == num_questions or not speculation["future"].cancel():
+            return
+    
+    # The resume changed or the queued job asked for a different count, so earlier work is stale
+    cancel_speculative_questions()
+    # fetch_questions raises on failure, so a failed head start falls back to the normal path with its error
+    future = get_speculation_executor().submit(fetch_questions, resume_text, num_questions)
+    st.session_state.speculative_questions = {"key": key, "num_questions": num_questions, "future": future}
+
+def take_speculative_questions(resume_text, num_questions):
+    """Return speculatively generated questions, waiting for the rest if still running, or None if there are none or they failed"""
+    speculation = st.session_state.speculative_questions
+    st.session_state.speculative_questions = None
+    if not speculation:
+        return None
+    
+    # A job still queued behind other sessions' work has no head start, so generate inline instead
+    future = speculation["future"]
+    if future.cancel() or speculation["key"] != get_speculation_key(resume_text):
+        future.cancel()
+        return None
+    
+    try:
+        questions = list(future.result(timeout=MODEL_ROUTES["generate"]["timeout"]))
+    except Exception:
+        return None
+    
+    # The question count was raised after the head start began
+    if len(questions) < num_questions:
+        questions.extend(generate_questions_from_resume(resume_text, num_questions - len(questions), route="top_up"))
+    return questions[:num_questions]
+
+def send_context_cache_request(request):
+    """Send a cachedContents request and return its status code and JSON body, or (None, None) if it failed"""
+    try:
+        response = requests.request(**request)
+    except requests.exceptions.RequestException:
+        return None, None
+    try:
+        return response.status_code, response.json()
+    except ValueError:
+        return response.status_code, None
+
+def create_context_cache(resume_text, num_questions):
+    """Register the evaluator instructions and resume as a cached prefix, or return None if unavailable"""
+    request = interview_core.build_context_cache_create(resume_text, num_questions)
+    if request is None:
+        return None
+    return interview_core.context_cache_created(*send_context_cache_request(request), time.time())
+
+def renew_context_cache(cache):
+    """Extend the cache TTL while the interview is running, or return None if it is gone"""
+    status_code, _ = send_context_cache_request(interview_core.build_context_cache_renew(cache))
+    return interview_core.context_cache_renewed(cache, status_code, time.time())
+
+def delete_context_cache(cache):
+    """Delete the cached prefix instead of waiting for it to expire"""
+    if cache:
+        send_context_cache_request(interview_core.build_context_cache_delete(cache))
+
+def discard_context_cache():
+    """Delete the session's cached prefix, including one that is still being created"""
+    future = st.session_state.context_cache_future
+    st.session_state.context_cache_future = None
+    if future is not None and not future.cancel():
+        future.add_done_callback(lambda done: delete_context_cache(done.result()))
     
-    with open(temp_file_path, 'rb') as file:
-        pdf_reader = PyPDF2.PdfReader(file)
-        for page in pdf_reader.pages:
-            text += page.extract_text()
+    delete_context_cache(st.session_state.context_cache)
+    st.session_state.context_cache = None
+
+def get_context_cache():
+    """The session's cached prefix for the evaluate route, renewed if it is close to expiring"""
+    # Attach the cache once its background creation has finished; until then evaluations go inline
+    future = st.session_state.context_cache_future
+    if future is not None and future.done():
+        st.session_state.context_cache_future = None
+        st.session_state.context_cache = future.result()
     
-    os.unlink(temp_file_path)
-    return text
+    cache = interview_core.usable_context_cache(st.session_state.context_cache)
+    if cache and interview_core.context_cache_needs_renewal(cache, time.time()):
+        with profile_section("gemini:cache renewal"):
+            cache = renew_context_cache(cache)
+        st.session_state.context_cache = cache
+    return cache
 
-def evaluate_answer(question, answer, resume_text):
+def evaluate_answer(question, answer, resume_text, conversation_summary=None):
     """Use Gemini API to evaluate the answer"""
     try:
-        prompt = f"""
-        You are a technical interviewer evaluating a candidate's response.
-        
-        Resume context: {resume_text[:2000]}
-        
-        Question: {question}
-        
-        Candidate's Answer: {answer}
-        
-        Evaluate the answer and provide:
-        1. A score out of 10
-        2. Specific feedback on strengths
-        3. Areas that could be improved
-        4. Suggestions for further development
-        
-        Respond in JSON format:
-        {{
-            "score": [1-10],
-            "feedback": "your detailed feedback",
-            "strengths": "what was good about the answer",
-            "improvements": "what could be improved"
-        }}
-        """
-        
-        headers = {
-            "Content-Type": "application/json",
-            "x-goog-api-key": GEMINI_API_KEY
-        }
-        
-        data = {
-            "contents": [{
-                "parts": [{
-                    "text": prompt
-                }]
-            }]
-        }
-        
-        response = requests.post(GEMINI_API_URL, headers=headers, json=data)
-        
-        if response.status_code == 200:
-            response_data = response.json()
-            text_response = response_data['candidates'][0]['content']['parts'][0]['text']
-            
-            try:
-                # Extract JSON from response (handling potential text before/after JSON)
-                json_str = text_response
-                if '```json' in text_response:
-                    json_str = text_response.split('```json')[1].split('```')[0].strip()
-                elif '```' in text_response:
-                    json_str = text_response.split('```')[1].strip()
-                
-                evaluation = json.loads(json_str)
-                return evaluation
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                return {
-                    "score": 5,
-                    "feedback": "Unable to parse evaluation. " + text_response[:200] + "...",
-                    "strengths": "N/A",
-                    "improvements": "N/A"
-                }
-        else:
-            return {
-                "score": 5,
-                "feedback": f"API Error: {response.status_code}",
-                "strengths": "N/A",
-                "improvements": "N/A"
-            }
+        plan = interview_core.plan_evaluation(question, answer, resume_text, conversation_summary, get_context_cache())
+        evaluation = None
+        while evaluation is None:
+            response = call_gemini("evaluate", plan["data"], plan["alternate_data"])
+            response_data = response.json() if response.status_code == 200 else None
+            evaluation, plan = interview_core.handle_evaluation_response(
+                st.session_state, plan, response.status_code, response_data
+            )
+        return evaluation
     except Exception as e:
-        return {
-            "score": 5,
-            "feedback": f"Error: {str(e)}",
-            "strengths": "N/A",
-            "improvements": "N/A"
-        }
+        return interview_core.fallback_evaluation(f"Error: {str(e)}")
+
+def generate_follow_up_question(question, answer, evaluation, conversation_summary):
+    """Generate a follow-up question that probes a weak answer, or None if generation fails"""
+    try:
+        prompt = interview_core.build_follow_up_prompt(question, answer, evaluation, conversation_summary)
+        response = call_gemini("follow_up", interview_core.build_gemini_request(prompt))
+        response_data = response.json() if response.status_code == 200 else None
+        return interview_core.handle_follow_up_response(st.session_state, prompt, response_data)
+    except Exception:
+        return None
 
 def display_messages():
     """Display chat messages in UI using st.chat_message"""
@@ -330,68 +561,41 @@ def display_messages():
 
 def generate_interview_summary():
     """Generate a summary of the interview performance"""
-    num_questions = len(st.session_state.evaluations)
-    average_score = st.session_state.total_score / num_questions if num_questions > 0 else 0
-    
-    # Return structured data instead of HTML
-    summary_data = {
-        "total_score": st.session_state.total_score,
-        "max_score": num_questions * 10,
-        "average_score": average_score,
-        "question_reviews": [],
-        "skill_areas": {}  # For tracking skill areas for radar chart
-    }
-    
-    for i, eval in enumerate(st.session_state.evaluations):
-        question = st.session_state.interview_questions[i] if i < len(st.session_state.interview_questions) else f"Question {i+1}"
-        summary_data["question_reviews"].append({
-            "question_number": i+1,
-            "question_text": question,
-            "score": eval.get('score', 0),
-            "strengths": eval.get('strengths', 'N/A'),
-            "improvements": eval.get('improvements', 'N/A')
-        })
-    
-    return summary_data
+    return interview_core.generate_interview_summary(st.session_state)
 
 def next_question():
     """Proceed to the next interview question"""
-    if st.session_state.current_question < len(st.session_state.interview_questions):
-        question = st.session_state.interview_questions[st.session_state.current_question]
-        # Add question number to the displayed question
-        question_with_number = f"Question {st.session_state.current_question + 1}/{st.session_state.num_questions}: {question}"
-        st.session_state.messages.append({"role": "assistant", "content": question_with_number})
-        st.session_state.current_question += 1
-    else:
-        if not st.session_state.interview_completed:
-            # Just mark the interview as completed, summary will be displayed outside chat
-            st.session_state.interview_completed = True
-            # Generate the summary and store it in session state
-            st.session_state.summary_data = generate_interview_summary()
+    interview_core.next_question(st.session_state)
 
 def start_interview():
     """Start the interview process"""
-    st.session_state.interview_started = True
-    st.session_state.messages = []
-    st.session_state.current_question = 0
-    st.session_state.evaluations = []
-    st.session_state.total_score = 0
-    st.session_state.interview_completed = False
+    # Register the evaluator prefix in the background; get_context_cache attaches it once ready
+    st.session_state.context_cache_future = get_gemini_executor().submit(
+        create_context_cache,
+        st.session_state.resume_text,
+        st.session_state.num_questions
+    )
     
     # Generate questions based on resume and selected number of questions
     with st.spinner("Analyzing your resume and generating personalized questions..."):
-        st.session_state.interview_questions = generate_questions_from_resume(
-            st.session_state.resume_text, 
-            st.session_state.num_questions
-        )
+        # Use the questions generated while the resume was being previewed, if any
+        with profile_section("wait for speculative questions"):
+            questions = take_speculative_questions(
+                st.session_state.resume_text,
+                st.session_state.num_questions
+            )
+        if questions is None:
+            questions = generate_questions_from_resume(
+                st.session_state.resume_text, 
+                st.session_state.num_questions
+            )
     
-    welcome_message = "Welcome to your technical interview! I'll ask you personalized questions based on your resume and evaluate your responses. Let's begin!"
-    st.session_state.messages.append({"role": "assistant", "content": welcome_message})
-    next_question()
+    interview_core.start_interview(st.session_state, questions)
 
 def reset_interview():
     """Reset interview state and start a new interview"""
     st.session_state.interview_started = False
+    discard_context_cache()
     start_interview()
 
 def update_interview_settings():
@@ -406,7 +610,8 @@ def update_interview_settings():
         with st.spinner("Generating additional questions..."):
             additional_questions = generate_questions_from_resume(
                 st.session_state.resume_text,
-                new_num - original_num
+                new_num - original_num,
+                route="top_up"
             )
             st.session_state.interview_questions.extend(additional_questions)
     
@@ -471,6 +676,169 @@ def create_score_distribution_pie_chart(summary_data):
     
     return fig
 
+def get_outbox_connection(db_path=None):
+    """Open the contact form outbox database; init_outbox must have created it"""
+    conn = sqlite3.connect(db_path or OUTBOX_DB_PATH, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_outbox(db_path=None):
+    """Create the outbox table and switch the database to WAL, once per process"""
+    conn = get_outbox_connection(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS contact_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                delivered_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_contact_outbox_due ON contact_outbox (status, next_attempt_at)")
+    finally:
+        conn.close()
+
+def enqueue_contact_submission(form_data, db_path=None):
+    """Durably store a contact form submission and return its outbox id"""
+    now = time.time()
+    conn = get_outbox_connection(db_path)
+    try:
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO contact_outbox (payload, next_attempt_at, created_at) VALUES (?, ?, ?)",
+                (json.dumps(form_data), now, now)
+            )
+        return cursor.lastrowid
+    finally:
+        conn.close()
+
+def get_submission_status(submission_id, db_path=None):
+    """Return the delivery status of a queued submission, or None if unknown"""
+    conn = get_outbox_connection(db_path)
+    try:
+        row = conn.execute(
+            "SELECT id, status, attempts, last_error, created_at, delivered_at FROM contact_outbox WHERE id = ?",
+            (submission_id,)
+        ).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def deliver_submission(session, form_data, endpoint=None):
+    """Post one submission to Web3Forms and return (delivered, retryable, error)"""
+    try:
+        response = session.post(endpoint or WEB3FORMS_ENDPOINT, data=form_data, timeout=10)
+    except requests.exceptions.RequestException as e:
+        return False, True, f"Network error: {str(e)}"
+
+    # Check for HTML success response
+    if response.status_code == 200 and "<title>Success!" in response.text:
+        return True, False, None
+
+    # Server-side and rate limit errors are worth retrying
+    if response.status_code == 429 or response.status_code >= 500:
+        return False, True, f"API returned {response.status_code}"
+
+    # Try to parse as JSON if not HTML
+    try:
+        result = response.json()
+    except ValueError:
+        return False, False, f"Unexpected response (Status: {response.status_code}): {response.text[:200]}"
+
+    if result.get("success"):
+        return True, False, None
+    return False, False, result.get("message", "Unknown error occurred")
+
+def drain_outbox(session, db_path=None, endpoint=None, batch_size=None):
+    """Deliver up to one batch of due submissions and return how many were attempted"""
+    now = time.time()
+    conn = get_outbox_connection(db_path)
+    try:
+        rows = conn.execute(
+            "SELECT id, payload, attempts FROM contact_outbox "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (now, batch_size or OUTBOX_BATCH_SIZE)
+        ).fetchall()
+
+        for row in rows:
+            delivered, retryable, error = deliver_submission(session, json.loads(row["payload"]), endpoint)
+            attempts = row["attempts"] + 1
+
+            if delivered:
+                status, next_attempt_at = "sent", now
+            elif retryable and attempts < OUTBOX_MAX_ATTEMPTS:
+                # Exponential backoff between delivery attempts
+                delay = min(OUTBOX_BACKOFF_BASE ** attempts, OUTBOX_BACKOFF_MAX)
+                status, next_attempt_at = "pending", time.time() + delay
+            else:
+                status, next_attempt_at = "failed", now
+
+            with conn:
+                conn.execute(
+                    "UPDATE contact_outbox SET status = ?, attempts = ?, next_attempt_at = ?, "
+                    "last_error = ?, delivered_at = ? WHERE id = ?",
+                    (status, attempts, next_attempt_at, error,
+                     time.time() if delivered else None, row["id"])
+                )
+        return len(rows)
+    finally:
+        conn.close()
+
+def prune_outbox(db_path=None):
+    """Delete sent and failed submissions past their retention and return how many were removed"""
+    now = time.time()
+    conn = get_outbox_connection(db_path)
+    try:
+        with conn:
+            # next_attempt_at holds the time a row was sent or given up on, so this uses the due index
+            cursor = conn.execute(
+                "DELETE FROM contact_outbox WHERE (status = 'sent' AND next_attempt_at < ?) "
+                "OR (status = 'failed' AND next_attempt_at < ?)",
+                (now - OUTBOX_SENT_RETENTION_DAYS * 86400, now - OUTBOX_FAILED_RETENTION_DAYS * 86400)
+            )
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def create_outbox_session():
+    """Create a pooled HTTP session for outbox delivery"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def run_outbox_sender(wakeup, db_path=None, endpoint=None):
+    """Background loop that keeps draining the outbox until the process exits"""
+    session = create_outbox_session()
+    pruned_at = 0
+    while True:
+        try:
+            # Keep going while full batches come back, otherwise wait for new work
+            if drain_outbox(session, db_path, endpoint) >= OUTBOX_BATCH_SIZE:
+                continue
+            if time.time() - pruned_at >= OUTBOX_PRUNE_INTERVAL:
+                pruned_at = time.time()
+                prune_outbox(db_path)
+        except Exception:
+            logger.exception("Contact outbox sender error")
+        wakeup.wait(OUTBOX_POLL_INTERVAL)
+        wakeup.clear()
+
+@st.cache_resource
+def start_outbox_sender():
+    """Start the single background outbox sender for this process"""
+    init_outbox()
+    wakeup = threading.Event()
+    sender = threading.Thread(target=run_outbox_sender, args=(wakeup,), name="contact-outbox-sender", daemon=True)
+    sender.start()
+    return wakeup
+
 def show_contact_page():
     """Display the contact page with proper Web3Forms response handling"""
     st.title("Contact Us")
@@ -481,9 +849,8 @@ def show_contact_page():
         We'd love to hear from you! Please fill out the form below or reach out to us directly.
         """)
         
-        # Web3Forms configuration
-        WEB3FORMS_ACCESS_KEY = "1cbc4557-1623-421b-aa23-8a40bb5be0e0"
-        WEB3FORMS_ENDPOINT = "https://api.web3forms.com/submit"
+        # Background delivery of queued messages, already running since main()
+        outbox_wakeup = start_outbox_sender()
         
         # Contact form
         with st.form("contact_form"):
@@ -524,40 +891,29 @@ def show_contact_page():
                         "redirect": "false"
                     }
                     
-                    # Send to Web3Forms with proper response handling
-                    with st.spinner("Sending your message..."):
-                        try:
-                            response = requests.post(
-                                WEB3FORMS_ENDPOINT,
-                                data=form_data,
-                                timeout=10
-                            )
-                            
-                            # Check for HTML success response
-                            if response.status_code == 200 and "<title>Success!" in response.text:
-                                st.success("Thank you for your message! We'll get back to you soon.")
-                            else:
-                                # Try to parse as JSON if not HTML
-                                try:
-                                    result = response.json()
-                                    if result.get("success"):
-                                        st.success("Thank you for your message! We'll get back to you soon.")
-                                    else:
-                                        error_msg = result.get("message", "Unknown error occurred")
-                                        st.error(f"Failed to send message: {error_msg}")
-                                except ValueError:
-                                    st.error(f"Unexpected response. Please try again. (Status: {response.status_code})")
-                                    st.text(f"Response content: {response.text[:200]}...")
-                            
-                        except requests.exceptions.RequestException as e:
-                            st.error(f"Network error occurred: {str(e)}")
-                        except Exception as e:
-                            st.error(f"An unexpected error occurred: {str(e)}")
+                    # Queue locally and let the background sender deliver it
+                    try:
+                        st.session_state.contact_submission_id = enqueue_contact_submission(form_data)
+                        outbox_wakeup.set()
+                        st.success("Thank you for your message! We'll get back to you soon.")
+                    except sqlite3.Error as e:
+                        st.error(f"An unexpected error occurred: {str(e)}")
                 else:
                     st.error("Please fill in all required fields (marked with *)")
             
             st.markdown('</div>', unsafe_allow_html=True)
         
+        # Delivery status of the last message sent from this session
+        if st.session_state.get('contact_submission_id'):
+            submission = get_submission_status(st.session_state.contact_submission_id)
+            if submission:
+                if submission["status"] == "sent":
+                    st.info("Your last message has been delivered.")
+                elif submission["status"] == "failed":
+                    st.warning(f"Your last message could not be delivered: {submission['last_error']}")
+                else:
+                    st.info(f"Your last message is queued for delivery (attempts: {submission['attempts']}).")
+        
         # Contact information
         st.markdown("""
         ## Alternative Contact Methods
@@ -627,6 +983,21 @@ def show_interview_page():
         # Update session state with selected number
         st.session_state.num_questions = num_questions
         
+        # Adaptive mode asks a follow-up after a low-scoring answer
+        st.session_state.adaptive_mode = st.checkbox(
+            "Adaptive follow-up questions",
+            value=st.session_state.adaptive_mode,
+            help="Ask a follow-up question when an answer scores below the threshold"
+        )
+        if st.session_state.adaptive_mode:
+            st.session_state.follow_up_threshold = st.slider(
+                "Follow-up score threshold",
+                min_value=1,
+                max_value=10,
+                value=st.session_state.follow_up_threshold,
+                help="Answers scoring below this get a follow-up question"
+            )
+        
         # Add "Apply Changes" button if interview is in progress
         if st.session_state.interview_started and not st.session_state.interview_completed:
             if st.button("Apply Changes"):
@@ -637,10 +1008,15 @@ def show_interview_page():
             
             # Display PDF preview
             with st.expander("Resume Preview", expanded=True):
-                resume_text = extract_text_from_pdf(uploaded_file)
+                with profile_section("extract_text_from_pdf"):
+                    resume_text = extract_text_from_pdf(uploaded_file)
                 st.text_area("Extracted Text", resume_text, height=300)
                 st.session_state.resume_text = resume_text
             
+            # Get a head start on question generation while the user reviews the preview
+            if not st.session_state.interview_started:
+                start_speculative_questions(st.session_state.resume_text, st.session_state.num_questions)
+            
             # Start interview button
             if not st.session_state.interview_started:
                 if st.button("Start Interview"):
@@ -650,6 +1026,10 @@ def show_interview_page():
             if st.session_state.interview_completed:
                 if st.button("Start New Interview"):
                     reset_interview()
+        
+        elif st.session_state.speculative_questions:
+            # Resume was removed before the interview started
+            cancel_speculative_questions()
     
     # Right column: Chat interface
     with col2:
@@ -659,14 +1039,16 @@ def show_interview_page():
         chat_container = st.container(height=550)
         
         with chat_container:
-            display_messages()
+            with profile_section("display_messages"):
+                display_messages()
         
         # Input for user's answer - This is the fixed version
         if st.session_state.interview_started and not st.session_state.interview_completed:
-            with st.form(key=f"answer_form_{st.session_state.current_question}"):
+            form_suffix = "_follow_up" if st.session_state.active_follow_up else ""
+            with st.form(key=f"answer_form_{st.session_state.current_question}{form_suffix}"):
                 user_answer = st.text_area(
                     "Your answer",
-                    key=f"user_input_{st.session_state.current_question}",
+                    key=f"user_input_{st.session_state.current_question}{form_suffix}",
                     height=100
                 )
                 
@@ -674,24 +1056,25 @@ def show_interview_page():
                 
                 if submitted and user_answer:
                     # Process the answer
-                    st.session_state.messages.append({"role": "user", "content": user_answer})
-                    
-                    current_q_index = st.session_state.current_question - 1
-                    question_text = st.session_state.interview_questions[current_q_index]
+                    question_text = interview_core.record_answer(st.session_state, user_answer)
                     
                     evaluation = evaluate_answer(
                         question_text, 
                         user_answer, 
-                        st.session_state.resume_text
+                        st.session_state.resume_text,
+                        st.session_state.conversation_summary if st.session_state.adaptive_mode else None
                     )
                     
-                    st.session_state.evaluations.append(evaluation)
-                    st.session_state.total_score += int(evaluation.get("score", 5))
+                    follow_up = None
+                    if interview_core.apply_evaluation(st.session_state, question_text, user_answer, evaluation):
+                        follow_up = generate_follow_up_question(
+                            question_text,
+                            user_answer,
+                            evaluation,
+                            st.session_state.conversation_summary
+                        )
                     
-                    eval_text = f"Question {current_q_index + 1}/{st.session_state.num_questions} - Score: {evaluation.get('score')}/10"
-                    st.session_state.messages.append({"role": "evaluation", "content": eval_text})
-                    
-                    next_question()
+                    interview_core.apply_follow_up(st.session_state, follow_up)
                     st.rerun()  # This will clear the form
     
     # Display performance metrics and detailed review outside chat window (below chat)
@@ -717,60 +1100,78 @@ def show_interview_page():
                                "Average" if st.session_state.summary_data['average_score'] >= 4 else "Needs Improvement"
             st.metric(label="Performance Level", value=performance_level)
         
-        # Add visualizations for performance
-        st.subheader("Performance Visualization")
-        
-        # Create DataFrame for bar chart of scores
-        scores_data = pd.DataFrame({
-            'Question': [f"Q{r['question_number']}" for r in st.session_state.summary_data["question_reviews"]],
-            'Score': [r['score'] for r in st.session_state.summary_data["question_reviews"]]
-        })
-        
-        # Create bar chart for scores
-        score_chart = alt.Chart(scores_data).mark_bar().encode(
-            x=alt.X('Question', sort=None),
-            y=alt.Y('Score', scale=alt.Scale(domain=[0, 10])),
-            color=alt.Color('Score:Q', scale=alt.Scale(
-                domain=[0, 4, 7, 10],
-                range=['red', 'orange', 'green', 'green']
-            )),
-            tooltip=['Question', 'Score']
-        ).properties(
-            title='Scores by Question',
-            width=600
-        )
+        with profile_section("results charts"):
+            # Add visualizations for performance
+            st.subheader("Performance Visualization")
         
-        st.altair_chart(score_chart, use_container_width=True)
+            # Create DataFrame for bar chart of scores
+            scores_data = pd.DataFrame({
+                'Question': [f"Q{r['question_number']}" for r in st.session_state.summary_data["question_reviews"]],
+                'Score': [r['score'] for r in st.session_state.summary_data["question_reviews"]]
+            })
         
-        # Add performance over time line chart
-        st.subheader("Performance Progression")
-        cumulative_scores = []
-        running_total = 0
+            # Create bar chart for scores
+            score_chart = alt.Chart(scores_data).mark_bar().encode(
+                x=alt.X('Question', sort=None),
+                y=alt.Y('Score', scale=alt.Scale(domain=[0, 10])),
+                color=alt.Color('Score:Q', scale=alt.Scale(
+                    domain=[0, 4, 7, 10],
+                    range=['red', 'orange', 'green', 'green']
+                )),
+                tooltip=['Question', 'Score']
+            ).properties(
+                title='Scores by Question',
+                width=600
+            )
         
-        for i, review in enumerate(st.session_state.summary_data["question_reviews"]):
-            running_total += review['score']
-            cumulative_scores.append({
-                'Question Number': i + 1,
-                'Average Score': running_total / (i + 1)
-            })
+            st.altair_chart(score_chart, use_container_width=True)
         
-        progress_data = pd.DataFrame(cumulative_scores)
+            # Add performance over time line chart
+            st.subheader("Performance Progression")
+            cumulative_scores = []
+            running_total = 0
         
-        progress_chart = alt.Chart(progress_data).mark_line(point=True).encode(
-            x='Question Number',
-            y=alt.Y('Average Score', scale=alt.Scale(domain=[0, 10])),
-            tooltip=['Question Number', 'Average Score']
-        ).properties(
-            title='Running Average Score',
-            width=600
-        )
+            for i, review in enumerate(st.session_state.summary_data["question_reviews"]):
+                running_total += review['score']
+                cumulative_scores.append({
+                    'Question Number': i + 1,
+                    'Average Score': running_total / (i + 1)
+                })
+        
+            progress_data = pd.DataFrame(cumulative_scores)
         
-        st.altair_chart(progress_chart, use_container_width=True)
+            progress_chart = alt.Chart(progress_data).mark_line(point=True).encode(
+                x='Question Number',
+                y=alt.Y('Average Score', scale=alt.Scale(domain=[0, 10])),
+                tooltip=['Question Number', 'Average Score']
+            ).properties(
+                title='Running Average Score',
+                width=600
+            )
+        
+            st.altair_chart(progress_chart, use_container_width=True)
+        
+            # Add pie chart for score distribution
+            st.subheader("Score Distribution")
+            pie_chart = create_score_distribution_pie_chart(st.session_state.summary_data)
+            st.plotly_chart(pie_chart, use_container_width=True)
         
-        # Add pie chart for score distribution
-        st.subheader("Score Distribution")
-        pie_chart = create_score_distribution_pie_chart(st.session_state.summary_data)
-        st.plotly_chart(pie_chart, use_container_width=True)
+            # Prompt size per turn stays flat in adaptive mode thanks to the rolling summary
+            if st.session_state.adaptive_mode and st.session_state.prompt_tokens:
+                st.subheader("Prompt Tokens per Turn")
+                tokens_data = pd.DataFrame(st.session_state.prompt_tokens)
+            
+                tokens_chart = alt.Chart(tokens_data).mark_line(point=True).encode(
+                    x=alt.X('turn:O', title='Turn'),
+                    y=alt.Y('tokens:Q', title='Prompt Tokens'),
+                    color=alt.Color('call:N', title='Call'),
+                    tooltip=['turn', 'call', 'tokens']
+                ).properties(
+                    title='Prompt Size per Turn',
+                    width=600
+                )
+            
+                st.altair_chart(tokens_chart, use_container_width=True)
         
         # Question-by-question review in expander
         with st.expander("Question-by-Question Review", expanded=True):
@@ -786,6 +1187,16 @@ def show_interview_page():
                 with cols[1]:
                     st.warning(f"**Areas to Improve:**\n{review['improvements']}")
                 
+                # Adaptive mode follow-ups, shown with the question they probe
+                for follow_up in review.get('follow_ups', []):
+                    st.write(f"**Follow-up:** {follow_up['question_text']}")
+                    st.write(f"**Follow-up Score:** {follow_up['score']}/10")
+                    cols = st.columns(2)
+                    with cols[0]:
+                        st.success(f"**Strengths:**\n{follow_up['strengths']}")
+                    with cols[1]:
+                        st.warning(f"**Areas to Improve:**\n{follow_up['improvements']}")
+                
                 st.divider()
         
         # Next steps and recommendations
@@ -804,6 +1215,12 @@ def show_interview_page():
 
 def main():
     """Main application function"""
+    # Deliver messages left in the outbox by an earlier run without waiting for a Contact page visit
+    start_outbox_sender()
+    
+    with profile_section("inject_custom_css"):
+        inject_custom_css()
+    
     # Navigation sidebar
     with st.sidebar:
         st.title("Navigation")
@@ -824,9 +1241,15 @@ def main():
     
     # Display the appropriate page based on navigation
     if st.session_state.current_page == "interview":
-        show_interview_page()
+        with profile_section("show_interview_page"):
+            show_interview_page()
     elif st.session_state.current_page == "contact":
-        show_contact_page()
+        with profile_section("show_contact_page"):
+            show_contact_page()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    profile_mode = get_profile_mode()
+    if profile_mode:
+        run_with_profiling(main, profile_mode)
+    else:
+        main()
\ No newline at end of file
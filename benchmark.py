@@ -0,0 +1,400 @@
+"""Benchmarks for the interview engine hot paths.
+
+Usage:
+    python benchmark.py --save-baseline     # record a baseline on this machine
+    python benchmark.py                     # compare against it, exit 1 on regressions
+    python benchmark.py --check             # same, but a missing baseline also fails (for CI)
+    python benchmark.py -k pdf --repeat 10  # run a subset
+
+In CI, record the baseline on the base commit with --save-baseline, then run --check on the
+change against that file. Every benchmark also checks the output of its warm-up run, and any
+run exits 1 when an output is wrong.
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import streamlit as st
+
+# Streamlit warns about the missing script context on every call outside `streamlit run`
+st.logger.set_log_level(logging.ERROR)
+
+import app
+import interview_core
+
+
+BASELINE_PATH = os.getenv("BENCHMARK_BASELINE", "benchmark_baseline.json")
+
+# Differences below these are treated as noise regardless of the threshold
+MIN_TIME_DELTA = 0.0005
+MIN_MEMORY_DELTA = 64 * 1024
+
+RESUME_TEXT = (
+    "Senior software engineer with 8 years of experience building Python services. "
+    "Designed REST APIs with Flask and FastAPI, data pipelines with pandas and Airflow, "
+    "and deployed containerized workloads with Docker and Kubernetes on AWS. "
+) * 20
+
+ANSWER_TEXT = (
+    "I would start by profiling the slow endpoint, look at the query plan, add the missing "
+    "index and cache the hot lookups, then verify with a load test before rolling out."
+)
+
+QUESTIONS = [
+    "How did you design the REST APIs in your last project?",
+    "Explain how you would scale an Airflow deployment.",
+    "What trade-offs did you make when containerizing your services?",
+    "How do you debug a memory leak in a long-running Python process?",
+    "Describe how you would migrate a monolith to Kubernetes."
+]
+
+EVALUATION = {
+    "score": 7,
+    "feedback": "Solid answer with a clear structure and relevant examples.",
+    "strengths": "Methodical approach, mentions measurement before and after the change.",
+    "improvements": "Could discuss monitoring and rollback strategies in more depth."
+}
+
+# Response text shapes seen from Gemini
+QUESTION_FIXTURES = {
+    "fenced_json": "```json\n" + json.dumps(QUESTIONS, indent=2) + "\n```",
+    "fenced_plain": "Here are the questions:\n```\n" + json.dumps(QUESTIONS) + "\n```",
+    "bare": json.dumps(QUESTIONS)
+}
+
+EVALUATION_FIXTURES = {
+    "fenced_json": "```json\n" + json.dumps(EVALUATION, indent=2) + "\n```",
+    "fenced_plain": "```\n" + json.dumps(EVALUATION) + "\n```",
+    "bare": json.dumps(EVALUATION),
+    "unparseable": "The candidate did reasonably well, I would give them a 7 out of 10."
+}
+
+
+class StubResponse:
+    """Minimal stand-in for a requests.Response carrying a Gemini payload"""
+
+    def __init__(self, text, status_code=200):
+        self.status_code = status_code
+        self.text = json.dumps({
+            "candidates": [{"content": {"parts": [{"text": text}]}}],
+            "usageMetadata": {"promptTokenCount": 500}
+        })
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def stub_reply(data):
+    """Pick a recorded response for a request based on its prompt"""
+    prompt = data["contents"][0]["parts"][0]["text"]
+    if "evaluating a candidate's response" in prompt:
+        return StubResponse(EVALUATION_FIXTURES["fenced_json"])
+    if "follow-up" in prompt:
+        return StubResponse("Can you walk me through how you measured the improvement?")
+    return StubResponse(QUESTION_FIXTURES["fenced_json"])
+
+
+@contextmanager
+def patched(name, replacement):
+    """Temporarily replace an attribute of the app module"""
+    original = getattr(app, name)
+    setattr(app, name, replacement)
+    try:
+        yield
+    finally:
+        setattr(app, name, original)
+
+
+def make_pdf(num_pages, lines_per_page=40):
+    """Build a text PDF with the given number of pages"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Page tree, filled in once the page ids are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_ids = []
+    for page in range(num_pages):
+        page_id = len(objects) + 1
+        page_ids.append(page_id)
+        lines = " ".join(
+            f"(Page {page + 1} line {line + 1}: Python, SQL, AWS, Docker and Kubernetes experience) '"
+            for line in range(lines_per_page)
+        )
+        stream = f"BT /F1 10 Tf 12 TL 50 780 Td {lines} ET".encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode("latin-1")
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {num_pages} >>".encode("latin-1")
+
+    output = io.BytesIO()
+    output.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(output.tell())
+        output.write(f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n")
+
+    xref_offset = output.tell()
+    output.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1"))
+    for offset in offsets:
+        output.write(f"{offset:010d} 00000 n \n".encode("latin-1"))
+    output.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("latin-1")
+    )
+    return io.BytesIO(output.getvalue())
+
+
+def load_evaluations(num_questions):
+    """Fill session state as if an interview with this many answers had finished"""
+    st.session_state.interview_questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(num_questions)]
+    st.session_state.evaluations = [
+        dict(EVALUATION, score=i % 11, question_text=st.session_state.interview_questions[i])
+        for i in range(num_questions)
+    ]
+    st.session_state.total_score = sum(e["score"] for e in st.session_state.evaluations)
+
+
+# Each benchmark setup returns (run, check): check inspects what run returned and
+# describes the mismatch, or returns None when the output is right
+
+def bench_extract_pdf(num_pages):
+    pdf = make_pdf(num_pages)
+
+    def check(text):
+        if f"Page {num_pages} line 40:" not in text:
+            return f"text of the last page is missing from {len(text)} extracted characters"
+    return (lambda: app.extract_text_from_pdf(pdf)), check
+
+
+def bench_question_parsing(fixture):
+    response = StubResponse(QUESTION_FIXTURES[fixture])
+
+    def run():
+        with patched("call_gemini", lambda route, data, alternate_data=None: response):
+            return app.generate_questions_from_resume(RESUME_TEXT, 5)
+
+    def check(questions):
+        if questions != QUESTIONS:
+            return f"parsed {questions!r}"
+    return run, check
+
+
+def bench_evaluation_parsing(fixture):
+    response = StubResponse(EVALUATION_FIXTURES[fixture])
+
+    def run():
+        st.session_state.prompt_tokens = []
+        with patched("call_gemini", lambda route, data, alternate_data=None: response):
+            return app.evaluate_answer(QUESTIONS[0], ANSWER_TEXT, RESUME_TEXT)
+
+    def check(evaluation):
+        if fixture == "unparseable":
+            if not evaluation["feedback"].startswith("Unable to parse evaluation."):
+                return f"expected the parse fallback, got {evaluation!r}"
+        elif {key: evaluation.get(key) for key in EVALUATION} != EVALUATION:
+            return f"expected score {EVALUATION['score']} and its feedback, got {evaluation!r}"
+    return run, check
+
+
+def bench_summary(num_questions):
+    load_evaluations(num_questions)
+
+    def check(summary):
+        if len(summary["question_reviews"]) != num_questions or summary["total_score"] != st.session_state.total_score:
+            return f"{len(summary['question_reviews'])} reviews with total score {summary['total_score']}"
+    return app.generate_interview_summary, check
+
+
+def bench_pie_chart(num_questions):
+    load_evaluations(num_questions)
+    summary = app.generate_interview_summary()
+
+    def check(fig):
+        if sum(fig.data[0].values) != num_questions:
+            return f"chart counts {sum(fig.data[0].values)} answers"
+    return (lambda: app.create_score_distribution_pie_chart(summary)), check
+
+
+def bench_interview(num_questions, adaptive=False):
+    """Run a whole interview through the engine with the HTTP layer stubbed out"""
+    def run():
+        st.session_state.resume_text = RESUME_TEXT
+        st.session_state.num_questions = num_questions
+        st.session_state.adaptive_mode = adaptive
+        st.session_state.follow_up_threshold = 8
+
+        with patched("post_gemini", lambda url, data, timeout, adapter: (stub_reply(data), 0.0)), \
+                patched("create_context_cache", lambda resume_text, num_questions: None):
+            app.start_interview()
+            while not st.session_state.interview_completed:
+                question = interview_core.record_answer(st.session_state, ANSWER_TEXT)
+                evaluation = app.evaluate_answer(
+                    question,
+                    ANSWER_TEXT,
+                    st.session_state.resume_text,
+                    st.session_state.conversation_summary if adaptive else None
+                )
+
+                follow_up = None
+                if interview_core.apply_evaluation(st.session_state, question, ANSWER_TEXT, evaluation):
+                    follow_up = app.generate_follow_up_question(
+                        question, ANSWER_TEXT, evaluation, st.session_state.conversation_summary
+                    )
+                interview_core.apply_follow_up(st.session_state, follow_up)
+
+        app.create_score_distribution_pie_chart(st.session_state.summary_data)
+        return st.session_state.summary_data
+
+    def check(summary):
+        reviews = summary["question_reviews"]
+        scores = [review["score"] for review in reviews]
+        scores += [follow_up["score"] for review in reviews for follow_up in review["follow_ups"]]
+        if len(reviews) != num_questions or any(score != EVALUATION["score"] for score in scores):
+            return f"{len(reviews)} reviews with scores {scores}"
+        if adaptive and not any(review["follow_ups"] for review in reviews):
+            return "no follow-up questions were asked"
+    return run, check
+
+
+BENCHMARKS = {
+    "extract_text_from_pdf[1 page]": lambda: bench_extract_pdf(1),
+    "extract_text_from_pdf[10 pages]": lambda: bench_extract_pdf(10),
+    "extract_text_from_pdf[100 pages]": lambda: bench_extract_pdf(100),
+    **{f"generate_questions_parse[{name}]": (lambda name=name: bench_question_parsing(name)) for name in QUESTION_FIXTURES},
+    **{f"evaluate_answer_parse[{name}]": (lambda name=name: bench_evaluation_parsing(name)) for name in EVALUATION_FIXTURES},
+    "generate_interview_summary[20]": lambda: bench_summary(20),
+    "generate_interview_summary[1000]": lambda: bench_summary(1000),
+    "create_score_distribution_pie_chart[20]": lambda: bench_pie_chart(20),
+    "create_score_distribution_pie_chart[1000]": lambda: bench_pie_chart(1000),
+    "simulated_interview[10]": lambda: bench_interview(10),
+    "simulated_interview[10 adaptive]": lambda: bench_interview(10, adaptive=True)
+}
+
+
+class WrongOutput(Exception):
+    """A benchmark produced a result other than the one its fixtures call for"""
+
+
+def measure(func, check, repeat):
+    """Return the median and minimum wall time and the peak traced memory of a callable"""
+    problem = check(func())  # Also warms up imports and caches
+    if problem:
+        raise WrongOutput(problem)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+
+    # Memory is traced in a separate run so tracing overhead does not skew timings
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "peak_bytes": peak}
+
+
+def compare(results, baseline, threshold):
+    """Return a list of regressions beyond the threshold relative to the baseline"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        time_delta = result["median_s"] - previous["median_s"]
+        if time_delta > MIN_TIME_DELTA and result["median_s"] > previous["median_s"] * (1 + threshold):
+            regressions.append(f"{name}: time {previous['median_s'] * 1000:.2f} ms -> {result['median_s'] * 1000:.2f} ms")
+        memory_delta = result["peak_bytes"] - previous["peak_bytes"]
+        if memory_delta > MIN_MEMORY_DELTA and result["peak_bytes"] > previous["peak_bytes"] * (1 + threshold):
+            regressions.append(f"{name}: peak memory {previous['peak_bytes'] / 1024:.0f} KiB -> {result['peak_bytes'] / 1024:.0f} KiB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the interview engine hot paths")
+    parser.add_argument("-k", dest="keyword", default="", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown or memory growth, as a fraction")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against or save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="fail when there is no baseline to compare against")
+    args = parser.parse_args()
+
+    results = {}
+    wrong = []
+    print(f"{'benchmark':<45} {'median':>10} {'min':>10} {'peak mem':>12}")
+    for name, setup in BENCHMARKS.items():
+        if args.keyword not in name:
+            continue
+        try:
+            result = measure(*setup(), args.repeat)
+        except WrongOutput as e:
+            wrong.append(f"{name}: {e}")
+            print(f"{name:<45} {'wrong output':>34}")
+            continue
+        results[name] = result
+        print(f"{name:<45} {result['median_s'] * 1000:>8.2f}ms {result['min_s'] * 1000:>8.2f}ms "
+              f"{result['peak_bytes'] / 1024:>9.0f}KiB")
+
+    if wrong:
+        # Timings of a broken code path say nothing, so don't compare or save them
+        print("\nWrong output:")
+        for problem in wrong:
+            print(f"  {problem}")
+        return 1
+
+    if args.save_baseline:
+        baseline = {"python": platform.python_version(), "machine": platform.machine(), "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline["results"] = json.load(f).get("results", {})
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline first")
+        return 1 if args.check else 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("python") != platform.python_version():
+        print(f"\nNote: baseline was recorded on Python {baseline.get('python')}")
+
+    missing = [name for name in results if name not in baseline.get("results", {})]
+    if missing and args.check:
+        print("\nNot in the baseline; run with --save-baseline to add them:")
+        for name in missing:
+            print(f"  {name}")
+        return 1
+
+    regressions = compare(results, baseline.get("results", {}), args.threshold)
+    if regressions:
+        print(f"\nRegressions beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
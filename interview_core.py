@@ -0,0 +1,767 @@
+"""UI-agnostic interview engine shared by the Streamlit app and the HTTP service.
+
+Nothing in here performs network I/O or touches Streamlit. Interview state is any
+mutable mapping (a plain dict or st.session_state) holding the keys created by
+new_interview_state().
+"""
+import os
+import json
+import tempfile
+from collections import deque
+import PyPDF2
+from dotenv import load_dotenv
+
+
+# Load environment variables
+load_dotenv()
+
+# API Config
+GEMINI_API_URL = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent")
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "your_api_key_here")
+GEMINI_ALT_API_URL = os.getenv("GEMINI_ALT_API_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-lite:generateContent")
+
+def load_model_route(name, timeout, hedge_after):
+    """Read the endpoint, alternate endpoint and deadlines for one call type"""
+    prefix = f"GEMINI_{name.upper()}"
+    return {
+        "url": os.getenv(f"{prefix}_URL", GEMINI_API_URL),
+        "alternate_url": os.getenv(f"{prefix}_ALT_URL", GEMINI_ALT_API_URL),
+        "timeout": float(os.getenv(f"{prefix}_TIMEOUT", str(timeout))),
+        "hedge_after": float(os.getenv(f"{prefix}_HEDGE_AFTER", str(hedge_after)))
+    }
+
+# Model routing per call type: bulk generation can wait, answer grading is latency critical
+MODEL_ROUTES = {
+    "generate": load_model_route("generate", timeout=60, hedge_after=20),
+    "evaluate": load_model_route("evaluate", timeout=30, hedge_after=6),
+    "top_up": load_model_route("top_up", timeout=45, hedge_after=12),
+    "follow_up": load_model_route("follow_up", timeout=30, hedge_after=6)
+}
+ROUTE_LATENCY_WINDOW = int(os.getenv("ROUTE_LATENCY_WINDOW", "50"))
+ROUTE_MIN_SAMPLES = int(os.getenv("ROUTE_MIN_SAMPLES", "10"))
+# How often a call re-checks whether its primary request has left the worker queue
+QUEUED_CALL_POLL = float(os.getenv("QUEUED_CALL_POLL", "0.05"))
+
+# Adaptive interview config: the rolling context sent with each prompt stays within these bounds
+CONTEXT_RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "3"))
+CONTEXT_ITEM_CHARS = int(os.getenv("CONTEXT_ITEM_CHARS", "200"))
+CONTEXT_WEAK_TOPICS = int(os.getenv("CONTEXT_WEAK_TOPICS", "3"))
+
+# Prompts only ever use this much of the resume
+RESUME_CONTEXT_CHARS = 3000
+EVALUATION_RESUME_CHARS = 2000
+
+# Server-side caching of the per-interview evaluator prefix through the cachedContents API.
+# Off by default: the prefix (instructions plus EVALUATION_RESUME_CHARS of resume) is about
+# 650 tokens, below the minimum cached content size of every Gemini model, so it can't benefit.
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+CONTEXT_CACHE_TTL = int(os.getenv("CONTEXT_CACHE_TTL", "900"))
+CONTEXT_CACHE_TIMEOUT = float(os.getenv("CONTEXT_CACHE_TIMEOUT", "10"))
+CONTEXT_CACHE_MAX_MISSES = int(os.getenv("CONTEXT_CACHE_MAX_MISSES", "2"))
+# Gemini rejects cached content below a per-model minimum; smaller prefixes are sent inline instead
+CONTEXT_CACHE_MIN_TOKENS = int(os.getenv("CONTEXT_CACHE_MIN_TOKENS", "4096"))
+# Pricing relative to one uncached input token (defaults: gemini-2.0-flash). Cached tokens are
+# still billed on every call at a reduced rate, and storage is billed per token-hour.
+CONTEXT_CACHE_BILLED_FRACTION = float(os.getenv("CONTEXT_CACHE_BILLED_FRACTION", "0.25"))
+CONTEXT_CACHE_STORAGE_COST = float(os.getenv("CONTEXT_CACHE_STORAGE_COST", "10"))
+
+WELCOME_MESSAGE = "Welcome to your technical interview! I'll ask you personalized questions based on your resume and evaluate your responses. Let's begin!"
+
+# Used to pad a short list of generated questions
+GENERIC_QUESTIONS = [
+    "Tell me about your background in software development.",
+    "Explain a challenging project you worked on and how you overcame obstacles.",
+    "How do you approach debugging a complex issue?",
+    "How do you stay updated with the latest technological trends?",
+    "Where do you see yourself in 5 years in terms of technical expertise?",
+    "What development methodologies are you familiar with?",
+    "Describe your experience with cloud platforms.",
+    "How do you handle code reviews?",
+    "What's your approach to continuous learning?",
+    "How do you prioritize tasks when working on multiple projects?",
+    "Describe your experience with performance optimization.",
+    "How do you ensure your code is secure?",
+    "What's your experience with containerization technologies?",
+    "How do you document your code?",
+    "Describe a time when you had to learn a new technology quickly."
+]
+
+# Used when question generation fails altogether
+DEFAULT_QUESTIONS = [
+    "Tell me about your background in software development.",
+    "Explain your experience with Python and related frameworks.",
+    "Describe a challenging project you worked on and how you overcame obstacles.",
+    "How do you approach debugging a complex issue in a production environment?",
+    "What's your experience with database systems and SQL?",
+    "How do you stay updated with the latest technological trends?",
+    "Explain your understanding of RESTful APIs and microservices.",
+    "Describe your experience with version control systems like Git.",
+    "How do you approach testing and ensuring code quality?",
+    "Where do you see yourself in 5 years in terms of technical expertise?",
+    "What development methodologies are you most comfortable with?",
+    "How do you handle requirements that change during development?",
+    "Tell me about your experience with cloud platforms.",
+    "How do you ensure your code is maintainable?",
+    "Describe your approach to code reviews.",
+    "What strategies do you use for debugging complex issues?",
+    "How do you stay current with technology trends?",
+    "Describe your experience with performance optimization.",
+    "How do you approach learning a new programming language or framework?",
+    "What's your experience with containerization and orchestration?"
+]
+
+def gemini_headers():
+    """Headers for a generateContent request"""
+    return {
+        "Content-Type": "application/json",
+        "x-goog-api-key": GEMINI_API_KEY
+    }
+
+def build_gemini_request(prompt):
+    """Wrap a prompt in a generateContent request body"""
+    return {
+        "contents": [{
+            "parts": [{
+                "text": prompt
+            }]
+        }]
+    }
+
+def extract_response_text(response_data):
+    """Return the text of the first candidate in a generateContent response"""
+    return response_data['candidates'][0]['content']['parts'][0]['text']
+
+def is_valid_response_data(response_data):
+    """Check that a generateContent response carries a usable candidate"""
+    try:
+        return bool(extract_response_text(response_data))
+    except (KeyError, IndexError, TypeError):
+        return False
+
+def new_route_latencies():
+    """Rolling latency windows per route, kept apart for the primary and alternate models"""
+    return {
+        name: {"primary": deque(maxlen=ROUTE_LATENCY_WINDOW), "alternate": deque(maxlen=ROUTE_LATENCY_WINDOW)}
+        for name in MODEL_ROUTES
+    }
+
+def rolling_p95(samples):
+    """Return the p95 of a latency window, or None until enough samples exist"""
+    samples = sorted(samples)
+    if len(samples) < ROUTE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+def hedge_threshold(route_name, p95):
+    """Fire the hedge at the route's observed p95, capped by its configured threshold"""
+    route = MODEL_ROUTES[route_name]
+    return route["hedge_after"] if p95 is None else min(p95, route["hedge_after"])
+
+def is_valid_gemini_response(response):
+    """Check that an HTTP response (requests or httpx) carries a usable candidate"""
+    if response is None or response.status_code != 200:
+        return False
+    try:
+        return is_valid_response_data(response.json())
+    except ValueError:
+        return False
+
+def new_hedged_call(route_name, p95):
+    """Track one routed request: when to hedge to the alternate model and when to give up
+
+    The hedge and deadline clocks start in hedged_call_started, once the primary request
+    is actually sent, so time spent waiting for a worker doesn't count against them.
+    """
+    route = MODEL_ROUTES[route_name]
+    return {
+        "started": {},
+        "timeout": route["timeout"],
+        "hedge_after": hedge_threshold(route_name, p95),
+        "deadline": None,
+        "hedge_at": None,
+        # Nothing to hedge to when the route has no distinct alternate
+        "hedged": not route["alternate_url"] or route["alternate_url"] == route["url"],
+        "fallback": None,
+        "error": None,
+        "samples": []
+    }
+
+def hedged_call_started(call, attempt, now):
+    """Start the latency clock of a primary or alternate request once it is sent"""
+    if attempt in call["started"]:
+        return
+    call["started"][attempt] = now
+    if attempt == "primary":
+        call["deadline"] = now + call["timeout"]
+        call["hedge_at"] = now + call["hedge_after"]
+
+def hedged_call_wait(call, now):
+    """Seconds to wait for a response before deciding again, or None once the deadline has passed"""
+    if call["deadline"] is None:
+        return QUEUED_CALL_POLL  # The primary is still waiting for a worker
+    if now >= call["deadline"]:
+        return None
+    wait_until = call["deadline"] if call["hedged"] else min(call["hedge_at"], call["deadline"])
+    return wait_until - now
+
+def hedged_call_accepts(call, attempt, response, elapsed):
+    """Return whether a finished primary or alternate request wins the call, keeping the first invalid response as a fallback"""
+    if is_valid_gemini_response(response):
+        call["samples"].append((attempt, elapsed))
+        return True
+    if call["fallback"] is None:
+        call["fallback"] = response
+    return False
+
+def hedge_timeout(call, now, pending):
+    """Timeout for the hedged request if it should fire now, otherwise None
+
+    The hedge fires once the primary is past the threshold, or as soon as it fails.
+    """
+    if call["hedged"] or call["hedge_at"] is None or (now < call["hedge_at"] and pending):
+        return None
+    call["hedged"] = True
+    return max(call["deadline"] - now, 0.1)
+
+def hedged_call_samples(call, pending_attempts, now):
+    """(attempt, seconds) latency samples to record once the call is over
+
+    A request still running at the end lost to the other model or ran into the deadline.
+    The time it had taken so far is a lower bound on its latency, and recording it keeps
+    the primary's p95 from only ever seeing its fast responses.
+    """
+    samples = list(call["samples"])
+    for attempt in pending_attempts:
+        if attempt in call["started"]:  # One that never left the worker queue says nothing about the model
+            samples.append((attempt, now - call["started"][attempt]))
+    return samples
+
+def estimate_tokens(text):
+    """Rough token count of a prompt, about four characters per token"""
+    return len(text) // 4
+
+def count_prompt_tokens(prompt, response_data=None):
+    """Prompt tokens billed at the full rate, preferring Gemini's own token count"""
+    tokens = None
+    if response_data:
+        usage = response_data.get('usageMetadata', {})
+        tokens = usage.get('promptTokenCount')
+        if tokens is not None:
+            tokens -= usage.get('cachedContentTokenCount', 0)
+    if tokens is None:
+        tokens = estimate_tokens(prompt)  # Usage metadata is missing
+    return tokens
+
+def record_prompt_tokens(state, call, prompt, response_data=None):
+    """Track the prompt size of each interview turn"""
+    state["prompt_tokens"].append({
+        "turn": len(state["evaluations"]) + 1,
+        "call": call,
+        "tokens": count_prompt_tokens(prompt, response_data)
+    })
+
+def build_question_prompt(resume_text, num_questions):
+    """Prompt asking for questions tailored to the resume"""
+    return f"""
+        You are a technical interviewer preparing for an interview with a candidate.
+
+        I have the candidate's resume text below. Based on their experience, skills, and background,
+        generate {num_questions} relevant technical interview questions that will help evaluate their knowledge and expertise.
+
+        The questions should be specific to their background and technical skills mentioned in the resume.
+        Include a mix of technical knowledge, problem-solving, and experience-based questions.
+
+        Resume: {resume_text[:RESUME_CONTEXT_CHARS]}
+
+        Output exactly {num_questions} questions as a JSON array of strings:
+        ["Question 1", "Question 2", ..., "Question {num_questions}"]
+        """
+
+def parse_questions(text_response, num_questions):
+    """Extract the JSON array of questions from a response, padded or trimmed to num_questions"""
+    # Extract JSON array from response
+    if '```json' in text_response:
+        json_str = text_response.split('```json')[1].split('```')[0].strip()
+    elif '```' in text_response:
+        json_str = text_response.split('```')[1].strip()
+    else:
+        json_str = text_response
+
+    # Clean up the JSON string if needed
+    json_str = json_str.replace('`', '')
+
+    # Parse the JSON to get the questions
+    questions = json.loads(json_str)
+
+    # Ensure we have exactly the requested number of questions
+    if len(questions) > num_questions:
+        questions = questions[:num_questions]
+    elif len(questions) < num_questions:
+        # Add generic questions if needed
+        questions.extend(GENERIC_QUESTIONS[:(num_questions-len(questions))])
+
+    return questions
+
+def default_questions(num_questions):
+    """Fallback questions when generation fails"""
+    return DEFAULT_QUESTIONS[:num_questions]
+
+def build_evaluation_prefix(resume_text):
+    """Static part of every evaluation prompt in an interview: instructions and resume context"""
+    return f"""
+        You are a technical interviewer evaluating a candidate's response.
+
+        For each question and answer you are given, evaluate the answer and provide:
+        1. A score out of 10
+        2. Specific feedback on strengths
+        3. Areas that could be improved
+        4. Suggestions for further development
+
+        Respond in JSON format:
+        {{
+            "score": [1-10],
+            "feedback": "your detailed feedback",
+            "strengths": "what was good about the answer",
+            "improvements": "what could be improved"
+        }}
+
+        Resume context: {resume_text[:EVALUATION_RESUME_CHARS]}
+        """
+
+def build_evaluation_turn(question, answer, conversation_summary=None):
+    """Per-answer part of an evaluation prompt"""
+    conversation_context = ""
+    if conversation_summary:
+        conversation_context = f"Interview so far:\n{format_conversation_summary(conversation_summary)}"
+
+    return f"""
+        {conversation_context}
+
+        Question: {question}
+
+        Candidate's Answer: {answer}
+        """
+
+def build_evaluation_prompt(question, answer, resume_text, conversation_summary=None):
+    """Prompt asking for a scored evaluation of one answer"""
+    return build_evaluation_prefix(resume_text) + build_evaluation_turn(question, answer, conversation_summary)
+
+def fallback_evaluation(feedback):
+    """Neutral evaluation used when the real one is unavailable"""
+    return {
+        "score": 5,
+        "feedback": feedback,
+        "strengths": "N/A",
+        "improvements": "N/A"
+    }
+
+def parse_evaluation(text_response):
+    """Extract the evaluation JSON from a response"""
+    try:
+        # Extract JSON from response (handling potential text before/after JSON)
+        json_str = text_response
+        if '```json' in text_response:
+            json_str = text_response.split('```json')[1].split('```')[0].strip()
+        elif '```' in text_response:
+            json_str = text_response.split('```')[1].strip()
+
+        evaluation = json.loads(json_str)
+        return evaluation
+    except json.JSONDecodeError:
+        # Fallback if JSON parsing fails
+        return fallback_evaluation("Unable to parse evaluation. " + text_response[:200] + "...")
+
+def gemini_api_root(url):
+    """API root of a generateContent URL, e.g. https://host/v1beta"""
+    return url.split("/models/")[0]
+
+def gemini_model_name(url):
+    """Model resource name of a generateContent URL, e.g. models/gemini-2.0-flash"""
+    return "models/" + url.split("/models/")[1].split(":")[0]
+
+def build_context_cache_request(url, resume_text):
+    """cachedContents body registering the evaluator prefix for the model behind url"""
+    return {
+        "model": gemini_model_name(url),
+        "displayName": "interview-evaluator",
+        "contents": [{
+            "role": "user",
+            "parts": [{
+                "text": build_evaluation_prefix(resume_text)
+            }]
+        }],
+        "ttl": f"{CONTEXT_CACHE_TTL}s"
+    }
+
+def new_context_cache(url, response_data, now):
+    """Track a created cache: its name, where it lives and when it expires"""
+    return {
+        "name": response_data["name"],
+        "api_root": gemini_api_root(url),
+        "model_url": url,
+        "expires_at": now + CONTEXT_CACHE_TTL
+    }
+
+def context_cache_url(cache):
+    """URL of a cache resource, used to renew or delete it"""
+    return f"{cache['api_root']}/{cache['name']}"
+
+def context_cache_request(method, url, json=None, params=None):
+    """Keyword arguments of a cachedContents HTTP request, accepted by requests and httpx alike"""
+    return {
+        "method": method,
+        "url": url,
+        "params": params,
+        "headers": gemini_headers(),
+        "json": json,
+        "timeout": CONTEXT_CACHE_TIMEOUT
+    }
+
+def context_cache_saves_tokens(prefix_tokens, expected_evaluations):
+    """Whether caching a prefix costs less than sending it inline with every evaluation
+
+    Costs are in uncached input tokens: the cache is written once at the full rate, stored for
+    at least one TTL, and every evaluation still bills the cached prefix at the reduced rate.
+    """
+    if prefix_tokens < CONTEXT_CACHE_MIN_TOKENS:
+        return False  # The API would reject it
+    inline_cost = prefix_tokens * expected_evaluations
+    cached_cost = prefix_tokens * (
+        1
+        + CONTEXT_CACHE_STORAGE_COST * CONTEXT_CACHE_TTL / 3600
+        + CONTEXT_CACHE_BILLED_FRACTION * expected_evaluations
+    )
+    return cached_cost < inline_cost
+
+def build_context_cache_create(resume_text, expected_evaluations):
+    """Request registering the evaluator prefix for the evaluate route, or None when caching wouldn't pay off"""
+    url = MODEL_ROUTES["evaluate"]["url"]
+    if not CONTEXT_CACHE_ENABLED or "/models/" not in url:
+        return None
+
+    body = build_context_cache_request(url, resume_text)
+    if not context_cache_saves_tokens(estimate_tokens(body["contents"][0]["parts"][0]["text"]), expected_evaluations):
+        return None
+    return context_cache_request("POST", gemini_api_root(url) + "/cachedContents", json=body)
+
+def build_context_cache_renew(cache):
+    """Request extending a cache by another TTL"""
+    return context_cache_request(
+        "PATCH",
+        context_cache_url(cache),
+        json={"ttl": f"{CONTEXT_CACHE_TTL}s"},
+        params={"updateMask": "ttl"}
+    )
+
+def build_context_cache_delete(cache):
+    """Request deleting a cache instead of waiting for it to expire"""
+    return context_cache_request("DELETE", context_cache_url(cache))
+
+def context_cache_created(status_code, response_data, now):
+    """The cache made by a create request, or None if it failed"""
+    if status_code != 200 or not isinstance(response_data, dict) or "name" not in response_data:
+        return None
+    return new_context_cache(MODEL_ROUTES["evaluate"]["url"], response_data, now)
+
+def context_cache_renewed(cache, status_code, now):
+    """The cache with its new expiry after a renew request, or None if it is gone"""
+    if status_code != 200:
+        return None
+    return dict(cache, expires_at=now + CONTEXT_CACHE_TTL)
+
+def usable_context_cache(cache):
+    """The cache if the evaluate route still sends to the model it was made for, otherwise None"""
+    if not cache or cache["model_url"] != MODEL_ROUTES["evaluate"]["url"]:
+        return None
+    return cache
+
+def context_cache_needs_renewal(cache, now):
+    """Renew once less than half of the TTL is left"""
+    return cache["expires_at"] - now < CONTEXT_CACHE_TTL / 2
+
+def build_cached_evaluation_request(cache, question, answer, conversation_summary=None):
+    """Evaluation request that references the cached prefix instead of resending it"""
+    return {
+        "cachedContent": cache["name"],
+        "contents": [{
+            "role": "user",
+            "parts": [{
+                "text": build_evaluation_turn(question, answer, conversation_summary)
+            }]
+        }]
+    }
+
+def note_context_cache_use(state, response_data):
+    """Drop the cache after repeated evaluations that were answered without it, e.g. once it expired upstream"""
+    cache = state["context_cache"]
+    if not cache or not response_data or "usageMetadata" not in response_data:
+        return
+
+    if response_data["usageMetadata"].get("cachedContentTokenCount"):
+        cache["misses"] = 0
+        return
+
+    # A hedged request to the alternate model answers inline, so a single miss is expected
+    cache["misses"] = cache.get("misses", 0) + 1
+    if cache["misses"] >= CONTEXT_CACHE_MAX_MISSES:
+        state["context_cache"] = None
+
+def plan_evaluation(question, answer, resume_text, conversation_summary=None, cache=None):
+    """Request bodies for evaluating an answer, referencing the cached prefix when there is one"""
+    prompt = build_evaluation_prompt(question, answer, resume_text, conversation_summary)
+    inline_data = build_gemini_request(prompt)
+    if not cache:
+        return {"prompt": prompt, "cache": None, "data": inline_data, "alternate_data": None}
+
+    # The alternate model can't use the cache, so its hedged request sends the prompt inline
+    return {
+        "prompt": prompt,
+        "cache": cache,
+        "data": build_cached_evaluation_request(cache, question, answer, conversation_summary),
+        "alternate_data": inline_data
+    }
+
+def handle_evaluation_response(state, plan, status_code, response_data):
+    """Apply an evaluate response: return (evaluation, None), or (None, plan to retry) if the cache was rejected"""
+    if plan["cache"] and status_code != 200:
+        # Cache expired or was rejected, fall back to the inline prompt from now on
+        state["context_cache"] = None
+        return None, dict(plan, cache=None, data=plan["alternate_data"], alternate_data=None)
+
+    if plan["cache"]:
+        note_context_cache_use(state, response_data)
+    record_prompt_tokens(state, "evaluate", plan["prompt"], response_data)
+
+    if response_data is not None:
+        return parse_evaluation(extract_response_text(response_data)), None
+    return fallback_evaluation(f"API Error: {status_code}"), None
+
+def build_follow_up_prompt(question, answer, evaluation, conversation_summary):
+    """Prompt asking for a follow-up that probes a weak answer"""
+    return f"""
+        You are a technical interviewer. The candidate gave a weak answer and you want to probe further.
+
+        Interview so far:
+        {format_conversation_summary(conversation_summary)}
+
+        Question: {question}
+
+        Candidate's Answer: {answer[:CONTEXT_ITEM_CHARS * 2]}
+
+        Areas that could be improved: {str(evaluation.get('improvements', 'N/A'))[:CONTEXT_ITEM_CHARS]}
+
+        Ask one short follow-up question that gives the candidate a chance to show deeper understanding
+        of the same topic. Output only the question text.
+        """
+
+def parse_follow_up(text_response):
+    """Clean up a generated follow-up question, or None if it is empty"""
+    return text_response.strip().strip('`"').strip() or None
+
+def handle_follow_up_response(state, prompt, response_data):
+    """Record a follow-up response and return its question, or None if there is none"""
+    record_prompt_tokens(state, "follow_up", prompt, response_data)
+    if response_data is None:
+        return None
+    return parse_follow_up(extract_response_text(response_data))
+
+def update_conversation_summary(summary, question, answer, score, threshold=5):
+    """Fold an answered question into the rolling summary, compacting older turns locally"""
+    if summary is None:
+        summary = {"earlier_count": 0, "earlier_total": 0, "weak_topics": [], "recent": []}
+
+    summary["recent"].append({
+        "question": question[:CONTEXT_ITEM_CHARS],
+        "answer": answer[:CONTEXT_ITEM_CHARS],
+        "score": score
+    })
+
+    # Older turns collapse into a running score and a short list of weak topics
+    while len(summary["recent"]) > CONTEXT_RECENT_TURNS:
+        oldest = summary["recent"].pop(0)
+        summary["earlier_count"] += 1
+        summary["earlier_total"] += oldest["score"]
+        if oldest["score"] < threshold:
+            summary["weak_topics"].append(oldest["question"][:80])
+            summary["weak_topics"] = summary["weak_topics"][-CONTEXT_WEAK_TOPICS:]
+
+    return summary
+
+def format_conversation_summary(summary):
+    """Render the rolling summary as prompt text"""
+    lines = []
+    if summary["earlier_count"]:
+        average = summary["earlier_total"] / summary["earlier_count"]
+        lines.append(f"Earlier: {summary['earlier_count']} answers, average score {average:.1f}/10.")
+        if summary["weak_topics"]:
+            lines.append("Weak earlier topics: " + "; ".join(summary["weak_topics"]))
+    for turn in summary["recent"]:
+        lines.append(f"Q: {turn['question']} | A: {turn['answer']} | Score: {turn['score']}/10")
+    return "\n".join(lines)
+
+def extract_text_from_pdf(pdf_file):
+    """Extract text from uploaded PDF file"""
+    text = ""
+    with tempfile.NamedTemporaryFile(delete=False) as temp_file:
+        temp_file.write(pdf_file.getvalue())
+        temp_file_path = temp_file.name
+
+    with open(temp_file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page in pdf_reader.pages:
+            text += page.extract_text()
+
+    os.unlink(temp_file_path)
+    return text
+
+def new_interview_state(resume_text="", num_questions=5, adaptive_mode=False, follow_up_threshold=5):
+    """Create the state of an interview that has not started yet"""
+    return {
+        "messages": [],
+        "current_question": 0,
+        "resume_text": resume_text,
+        "interview_started": False,
+        "interview_completed": False,
+        "interview_questions": [],
+        "evaluations": [],
+        "total_score": 0,
+        "num_questions": num_questions,
+        "adaptive_mode": adaptive_mode,
+        "follow_up_threshold": follow_up_threshold,
+        "active_follow_up": None,
+        "conversation_summary": None,
+        "prompt_tokens": [],
+        "context_cache": None
+    }
+
+def start_interview(state, questions):
+    """Reset the interview progress and ask the first of the given questions"""
+    state["interview_started"] = True
+    state["messages"] = []
+    state["current_question"] = 0
+    state["evaluations"] = []
+    state["total_score"] = 0
+    state["interview_completed"] = False
+    state["active_follow_up"] = None
+    state["conversation_summary"] = None
+    state["prompt_tokens"] = []
+    state["interview_questions"] = questions
+
+    state["messages"].append({"role": "assistant", "content": WELCOME_MESSAGE})
+    next_question(state)
+
+def next_question(state):
+    """Proceed to the next interview question"""
+    if state["current_question"] < len(state["interview_questions"]):
+        question = state["interview_questions"][state["current_question"]]
+        # Add question number to the displayed question
+        question_with_number = f"Question {state['current_question'] + 1}/{state['num_questions']}: {question}"
+        state["messages"].append({"role": "assistant", "content": question_with_number})
+        state["current_question"] += 1
+    else:
+        if not state["interview_completed"]:
+            # Just mark the interview as completed, summary will be displayed outside chat
+            state["interview_completed"] = True
+            # Generate the summary and store it in the state
+            state["summary_data"] = generate_interview_summary(state)
+
+def pending_question(state):
+    """The question the candidate is expected to answer now, or None when there is none"""
+    if not state["interview_started"] or state["interview_completed"]:
+        return None
+    if state["active_follow_up"] is not None:
+        return state["active_follow_up"]
+    return state["interview_questions"][state["current_question"] - 1]
+
+def record_answer(state, answer):
+    """Add the candidate's answer to the conversation and return the question it answers"""
+    question_text = pending_question(state)
+    state["messages"].append({"role": "user", "content": answer})
+    return question_text
+
+def apply_evaluation(state, question_text, answer, evaluation):
+    """Record an evaluation and return whether a follow-up question should be asked"""
+    is_follow_up = state["active_follow_up"] is not None
+    evaluation["question_text"] = question_text
+    score = int(evaluation.get("score", 5))
+
+    state["evaluations"].append(evaluation)
+    if is_follow_up:
+        # Reviewed under the question it probes, without changing the interview totals
+        evaluation["follow_up_of"] = state["current_question"]
+    else:
+        evaluation["question_number"] = state["current_question"]
+        state["total_score"] += score
+
+    question_label = f"Question {state['current_question']}/{state['num_questions']}"
+    if is_follow_up:
+        question_label += " (follow-up)"
+    eval_text = f"{question_label} - Score: {evaluation.get('score')}/10"
+    state["messages"].append({"role": "evaluation", "content": eval_text})
+
+    if not state["adaptive_mode"]:
+        return False
+
+    state["conversation_summary"] = update_conversation_summary(
+        state["conversation_summary"],
+        question_text,
+        answer,
+        score,
+        state["follow_up_threshold"]
+    )
+    # At most one follow-up per question
+    return not is_follow_up and score < state["follow_up_threshold"]
+
+def apply_follow_up(state, follow_up):
+    """Ask the follow-up question if there is one, otherwise move on to the next question"""
+    state["active_follow_up"] = follow_up
+    if follow_up:
+        state["messages"].append({"role": "assistant", "content": f"Follow-up: {follow_up}"})
+    else:
+        next_question(state)
+
+def generate_interview_summary(state):
+    """Generate a summary of the interview performance"""
+    num_questions = sum(1 for eval in state["evaluations"] if eval.get("follow_up_of") is None)
+    average_score = state["total_score"] / num_questions if num_questions > 0 else 0
+
+    # Return structured data instead of HTML
+    summary_data = {
+        "total_score": state["total_score"],
+        "max_score": num_questions * 10,
+        "average_score": average_score,
+        "question_reviews": [],
+        "skill_areas": {}  # For tracking skill areas for radar chart
+    }
+
+    interview_questions = state.get("interview_questions", [])
+    reviews_by_number = {}
+    for eval in state["evaluations"]:
+        parent = reviews_by_number.get(eval.get("follow_up_of"))
+        if parent is not None:
+            # Follow-ups are listed with the question they probe
+            parent["follow_ups"].append({
+                "question_text": eval.get('question_text'),
+                "score": eval.get('score', 0),
+                "strengths": eval.get('strengths', 'N/A'),
+                "improvements": eval.get('improvements', 'N/A')
+            })
+            continue
+
+        i = len(summary_data["question_reviews"])
+        number = eval.get("question_number", i + 1)
+        question = eval.get('question_text')
+        if question is None:
+            question = interview_questions[number - 1] if number <= len(interview_questions) else f"Question {number}"
+        review = {
+            "question_number": number,
+            "question_text": question,
+            "score": eval.get('score', 0),
+            "strengths": eval.get('strengths', 'N/A'),
+            "improvements": eval.get('improvements', 'N/A'),
+            "follow_ups": []
+        }
+        summary_data["question_reviews"].append(review)
+        reviews_by_number[number] = review
+
+    return summary_data